@@ -0,0 +1,121 @@
+"""
+Answer normalization and matching for the Russian Noun Cases Drill application.
+
+Answers are compared in a canonical spelling: lower case, ё written as е,
+stress marks removed, Latin letters that look like Cyrillic ones replaced
+by the Cyrillic letter, and surrounding punctuation stripped. An answer
+that is not accepted but lies within a small edit distance of an accepted
+form is graded "almost" so the learner can be told it was a typo, unless
+it is exactly another form of the same word: слова for слову is a wrong
+case, not a misspelling.
+"""
+
+from typing import Container, Iterable, Optional
+
+CORRECT = "correct"
+ALMOST = "almost"
+WRONG = "wrong"
+
+# Latin letters typed in place of the Cyrillic letters they look like
+_LOOKALIKES = {
+    "A": "А", "B": "В", "C": "С", "E": "Е", "H": "Н", "K": "К", "M": "М",
+    "O": "О", "P": "Р", "T": "Т", "X": "Х", "Y": "У",
+    "a": "а", "c": "с", "e": "е", "k": "к", "o": "о", "p": "р", "x": "х", "y": "у",
+}
+
+_NORMALIZE_TABLE = str.maketrans({
+    **_LOOKALIKES,
+    "ё": "е",
+    "Ё": "Е",
+    # Combining acute and grave accents used to mark stress
+    "\u0301": None,
+    "\u0300": None,
+})
+
+_PUNCTUATION = " \t\n.,!?;:\"'«»()-"
+
+
+def normalize_answer(text: str) -> str:
+    """Return the canonical spelling an answer is compared in."""
+    return text.translate(_NORMALIZE_TABLE).lower().strip(_PUNCTUATION)
+
+
+def normalization_rules() -> dict:
+    """Describe normalize_answer for clients that reimplement it."""
+    return {
+        "map": {chr(code): (repl if repl is not None else "") for code, repl in _NORMALIZE_TABLE.items()},
+        "strip": _PUNCTUATION,
+    }
+
+
+def within_edits(a: str, b: str, max_edits: int) -> bool:
+    """
+    Check whether two strings are at most max_edits apart.
+
+    Counts insertions, deletions, substitutions and swaps of adjacent
+    letters, and only fills the diagonal band the bound allows.
+    """
+    if abs(len(a) - len(b)) > max_edits:
+        return False
+    if a == b:
+        return True
+    # Rows of the optimal string alignment matrix; cells outside the band
+    # are treated as exceeding the bound
+    too_far = max_edits + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (len(b) + 1)
+        if i <= max_edits:
+            current[0] = i
+        low, high = max(1, i - max_edits), min(len(b), i + max_edits)
+        row_best = current[0]
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (before is not None and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+            row_best = min(row_best, value)
+        if row_best > max_edits:
+            return False
+        before, previous = previous, current
+    return previous[len(b)] <= max_edits
+
+
+def max_edits_for(answer: str) -> int:
+    """Typos tolerated for an answer of this length."""
+    return 1 if len(answer) <= 6 else 2
+
+
+def grade_answer(user_input: str, correct_answer: str, accepted: Optional[Iterable[str]] = None,
+                 lemma_forms: Container[str] = ()) -> str:
+    """
+    Grade an answer against the accepted forms.
+
+    Args:
+        user_input: The user's answer
+        correct_answer: The answer shown to the user
+        accepted: Normalized spellings of every accepted form; defaults to
+            the correct answer alone
+        lemma_forms: Normalized spellings of every form of the word; an
+            answer that is one of them but not accepted is WRONG, however
+            close its spelling
+
+    Returns:
+        CORRECT, ALMOST (within a few typos of an accepted form) or WRONG
+    """
+    if accepted is None:
+        accepted = (normalize_answer(correct_answer),)
+    answer = normalize_answer(user_input)
+    if not answer:
+        return WRONG
+    if answer in accepted:
+        return CORRECT
+    if answer in lemma_forms:
+        return WRONG
+    for form in accepted:
+        if within_edits(answer, form, max_edits_for(form)):
+            return ALMOST
+    return WRONG
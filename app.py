@@ -5,22 +5,70 @@ This Flask application helps users practice Russian noun declensions through
 various interactive drills.
 """
 
-import pymorphy3
+
+from startup import prewarm, profile_imports, timed
+
+# Installed before the heavy imports so they show up in the startup report
+profile_imports()
+
 from flask import Flask
+from jinja2 import FileSystemBytecodeCache
 
-from config import Config
+from config import Config, private_directory
+from metrics import InstrumentedMorphology, Metrics, cache_collector, init_metrics
+from morph_service import MorphClient
+from morphology import CachedMorphology, Morphology, get_analyzer
 from routes import init_routes
+from sessions import create_session_interface
 
 def create_app(config_class=Config):
     """Create and configure the Flask application."""
     app = Flask(__name__)
     app.config.from_object(config_class)
 
-    # Initialize the pymorphy3 analyzer
-    morph = pymorphy3.MorphAnalyzer()
+    # Keep compiled templates on disk so new workers skip Jinja compilation
+    if app.config['TEMPLATE_BYTECODE_CACHE']:
+        cache_dir = app.config['TEMPLATE_CACHE_DIR']
+        if cache_dir:
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(private_directory(cache_dir))
+        else:
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+    session_interface = create_session_interface(app.config)
+    if session_interface is not None:
+        app.session_interface = session_interface
+
+    # Initialize the pymorphy3 analyzer, or connect to the morphology service
+    if app.config['MORPH_SERVICE']:
+        authkey = app.config['MORPH_SERVICE_AUTHKEY']
+        backend = MorphClient(app.config['MORPH_SERVICE'], authkey.encode() if authkey else None)
+    elif not app.config['SHARE_ANALYZER']:
+        import pymorphy3
+
+        with timed("morph_analyzer"):
+            backend = Morphology(pymorphy3.MorphAnalyzer())
+    elif app.config['LAZY_INIT']:
+        # The shared analyzer is loaded by the first request that needs it
+        backend = Morphology()
+    else:
+        backend = Morphology(get_analyzer())
+    # Only cache misses reach the instrumented backend and count as analyzer time
+    metrics = Metrics()
+    morph = CachedMorphology(
+        InstrumentedMorphology(backend, metrics),
+        maxsize=app.config['MORPH_CACHE_SIZE'],
+    )
+    metrics.add_collector(cache_collector(morph))
+    init_metrics(app, metrics)
 
     # Initialize routes
-    init_routes(app, morph)
+    with timed("init_routes"):
+        init_routes(app, morph)
+
+    # Load whatever is still lazy and warm the caches before serving
+    if app.config['PREWARM']:
+        with timed("prewarm"):
+            prewarm(app)
 
     return app
 
@@ -0,0 +1,178 @@
+"""
+ASGI entry point for the Russian Noun Cases Drill application.
+
+Serves the same Flask app from an asyncio event loop:
+
+    uvicorn asgi:app
+
+Idle and slow connections are held by the event loop, which costs almost
+nothing per connection. Each request is handed to a bounded thread pool
+where the synchronous Flask handler (question generation, analyzer calls,
+template rendering) runs; when every thread is busy and the wait queue is
+full, new requests are refused immediately with 503 and Retry-After
+instead of piling up.
+"""
+
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from app import create_app
+
+
+class WSGIOffload:
+    """ASGI application running a WSGI app on a bounded thread pool."""
+
+    def __init__(self, wsgi_app, max_workers: int, max_pending: int, max_body_size: int):
+        """
+        Args:
+            wsgi_app: The WSGI callable to serve
+            max_workers: Threads running requests concurrently
+            max_pending: Requests allowed to wait for a thread before 503s
+            max_body_size: Largest accepted request body in bytes
+        """
+        self.wsgi_app = wsgi_app
+        self.max_in_flight = max_workers + max_pending
+        self.max_body_size = max_body_size
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="drill-wsgi")
+        # Only touched from the event loop thread, so no lock is needed
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        if self.in_flight >= self.max_in_flight:
+            await self._simple_response(send, 503, b"Server busy, please retry.\n",
+                                        [(b"retry-after", b"1")])
+            return
+
+        self.in_flight += 1
+        try:
+            body = await self._read_body(receive)
+            if body is None:
+                await self._simple_response(send, 413, b"Request body too large.\n")
+                return
+
+            environ = self._environ(scope, body)
+            loop = asyncio.get_running_loop()
+            status, headers, chunks = await loop.run_in_executor(self.executor, self._run_wsgi, environ)
+        finally:
+            self.in_flight -= 1
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"".join(chunks)})
+
+    async def _read_body(self, receive):
+        """Collect the request body; None if it exceeds max_body_size."""
+        parts, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_size:
+                return None
+            parts.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(parts)
+
+    @staticmethod
+    async def _simple_response(send, status: int, body: bytes, headers=()):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8"),
+                        (b"content-length", str(len(body)).encode())] + list(headers),
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _environ(scope, body: bytes) -> dict:
+        """Translate an ASGI HTTP scope into a PEP 3333 environ."""
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": str(server[0]),
+            "SERVER_PORT": str(server[1]) if server[1] is not None else "80",
+            "REMOTE_ADDR": str(client[0]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for raw_name, raw_value in scope.get("headers", []):
+            name = raw_name.decode("latin-1").upper().replace("-", "_")
+            value = raw_value.decode("latin-1")
+            if name == "CONTENT_TYPE":
+                environ["CONTENT_TYPE"] = value
+            elif name == "CONTENT_LENGTH":
+                environ["CONTENT_LENGTH"] = value
+            else:
+                key = "HTTP_" + name
+                if key in environ:
+                    # Cookie pairs are separated by "; " (RFC 6265), other lists by ","
+                    separator = "; " if key == "HTTP_COOKIE" else ","
+                    value = f"{environ[key]}{separator}{value}"
+                environ[key] = value
+        return environ
+
+    def _run_wsgi(self, environ) -> Tuple[int, List[Tuple[bytes, bytes]], List[bytes]]:
+        """Call the WSGI app on a pool thread and collect its full response."""
+        response = {}
+        chunks: List[bytes] = []
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                                   for name, value in headers]
+            return chunks.append
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    chunks.append(chunk)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], chunks
+
+
+def create_asgi_app(flask_app=None):
+    """Wrap a Flask app (by default create_app()) for ASGI servers."""
+    flask_app = flask_app or create_app()
+    return WSGIOffload(
+        flask_app,
+        max_workers=flask_app.config['ASGI_WORKER_THREADS'],
+        max_pending=flask_app.config['ASGI_MAX_PENDING'],
+        max_body_size=flask_app.config['ASGI_MAX_BODY_SIZE'],
+    )
+
+
+app = create_asgi_app()
@@ -0,0 +1,289 @@
+"""
+Load test and micro-benchmark suite for the Russian Noun Cases Drill application.
+
+Drives create_app() through the Flask test client for the GET / next /
+submit flow of every drill, times the hot helper functions directly, and
+reports throughput, p50/p95/p99 latency and peak traced memory per
+scenario. Results are compared with a baseline file; a scenario whose p50
+latency regresses beyond the tolerance makes the run exit with status 1.
+(The median is used as the gate because tail latencies of sub-millisecond
+calls are too noisy to compare run to run.)
+
+    python benchmarks/bench_app.py                  # compare with baseline.json
+    python benchmarks/bench_app.py --save-baseline  # record a new baseline
+    python benchmarks/bench_app.py --gunicorn       # also load-test a local gunicorn
+
+Baselines are machine-specific: record one on the machine that runs the
+comparison.
+"""
+
+import argparse
+import json
+import os
+import re
+import resource
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TOKEN_RE = re.compile(r'name="token" value="([^"]*)"')
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 10) -> Dict[str, float]:
+    """Time fn and return throughput, latency percentiles (ms) and peak traced memory."""
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    # Memory is traced in a separate, shorter pass; tracing skews timings
+    tracemalloc.start()
+    for _ in range(max(1, iterations // 10)):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "throughput_per_s": iterations / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def endpoint_scenarios(client) -> Dict[str, Callable[[], object]]:
+    """Build request callables for every drill flow."""
+
+    def get(path):
+        def call():
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+            return response
+        return call
+
+    def post(path, data):
+        def call():
+            response = client.post(path, data=data)
+            assert response.status_code == 200, (path, response.status_code)
+            return response
+        return call
+
+    def token(path):
+        return TOKEN_RE.search(client.get(path).get_data(as_text=True)).group(1)
+
+    forward_options = {"cases": ["gent", "datv", "ablt"], "numbers": ["sing", "plur"]}
+    return {
+        "home GET": get("/"),
+        "forward GET": get("/forward_drill"),
+        "forward next": post("/forward_drill", {"action": "next", **forward_options}),
+        "forward submit": post("/forward_drill", {
+            "action": "submit", "answer": "слова", "token": token("/forward_drill"), **forward_options,
+        }),
+        "backward GET": get("/backward_drill"),
+        "backward next": post("/backward_drill", {"action": "next", "number_mode": "both"}),
+        "backward submit": post("/backward_drill", {
+            "action": "submit", "selected_case": "gent", "selected_number": "sing",
+            "number_mode": "both", "token": token("/backward_drill"),
+        }),
+        "insert GET": get("/insert_drill"),
+        "insert next": post("/insert_drill", {"action": "next"}),
+        "insert submit": post("/insert_drill", {
+            "action": "submit", "answer": "школы", "token": token("/insert_drill"),
+        }),
+        "api questions x50": get("/api/questions/forward?count=50&cases=gent&cases=datv&numbers=plur"),
+    }
+
+
+def micro_scenarios() -> Dict[str, Callable[[], object]]:
+    """Build callables for the helper functions on the request path."""
+    from models import DrillData
+    from morphology import CachedMorphology, Morphology, get_analyzer
+    from paradigms import DeclensionIndex
+    from utils import generate_question
+
+    analyzer = get_analyzer()
+    drill_data = DrillData().snapshot
+    morph = CachedMorphology(Morphology(analyzer), maxsize=10000)
+    uncached = Morphology(analyzer)
+    declensions = DeclensionIndex(morph, drill_data.top_nouns)
+    cases, numbers = ["gent", "datv", "ablt"], ["sing", "plur"]
+
+    return {
+        "DrillData load": DrillData,
+        "generate_question (index)": lambda: generate_question(
+            morph, cases, numbers, drill_data=drill_data, declensions=declensions
+        ),
+        "generate_question (analyzer)": lambda: generate_question(
+            uncached, cases, numbers, drill_data=drill_data
+        ),
+        "analyzer inflect": lambda: uncached.inflect("человек", "ablt", "plur"),
+        "analyzer case_number_pairs": lambda: uncached.case_number_pairs("людьми"),
+        "cached case_number_pairs": lambda: morph.case_number_pairs("людьми"),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def gunicorn_scenarios(iterations: int, concurrency: int) -> Dict[str, Dict[str, float]]:
+    """Load-test a local gunicorn with concurrent keep-alive-less HTTP clients."""
+    port = free_port()
+    env = dict(os.environ, BIND=f"127.0.0.1:{port}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"), "app:create_app()"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                urllib.request.urlopen(base + "/", timeout=1).read()
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.2)
+
+        def request(path, data=None):
+            body = urllib.parse.urlencode(data, doseq=True).encode() if data else None
+            t0 = time.perf_counter()
+            urllib.request.urlopen(base + path, data=body, timeout=30).read()
+            return time.perf_counter() - t0
+
+        results = {}
+        flows = {
+            "gunicorn forward GET": ("/forward_drill", None),
+            "gunicorn backward next": ("/backward_drill", {"action": "next"}),
+            "gunicorn insert next": ("/insert_drill", {"action": "next"}),
+        }
+        for name, (path, data) in flows.items():
+            with ThreadPoolExecutor(concurrency) as pool:
+                start = time.perf_counter()
+                latencies = sorted(pool.map(lambda _: request(path, data), range(iterations)))
+                elapsed = time.perf_counter() - start
+            results[name] = {
+                "iterations": iterations,
+                "throughput_per_s": iterations / elapsed,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+                "peak_kib": 0.0,
+            }
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(results, baseline, tolerance, min_delta_ms) -> List[str]:
+    """Return a message for every scenario whose p50 regressed past the tolerance."""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        # Sub-microsecond helpers jitter by large ratios; require an absolute slowdown too
+        limit = max(expected["p50_ms"] * (1 + tolerance), expected["p50_ms"] + min_delta_ms)
+        if result["p50_ms"] > limit:
+            regressions.append(
+                f"{name}: p50 {result['p50_ms']:.3f} ms > {limit:.3f} ms "
+                f"(baseline {expected['p50_ms']:.3f} ms)"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the drill endpoints and helpers.")
+    parser.add_argument("--iterations", type=int, default=500, help="Calls per scenario")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed p50 slowdown relative to the baseline (0.5 = 50%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05,
+                        help="Ignore p50 slowdowns smaller than this many milliseconds")
+    parser.add_argument("--gunicorn", action="store_true", help="Also load-test a local gunicorn")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients for --gunicorn")
+    parser.add_argument("--only", help="Run only scenarios whose name contains this text")
+    args = parser.parse_args(argv)
+
+    from app import create_app
+
+    app = create_app()
+    app.config.update(TESTING=True, DEBUG=False)
+    client = app.test_client()
+
+    scenarios = {**endpoint_scenarios(client), **micro_scenarios()}
+    if args.only:
+        scenarios = {name: fn for name, fn in scenarios.items() if args.only in name}
+
+    results = {}
+    print(f"{'scenario':<32} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KiB':>10}")
+    for name, fn in scenarios.items():
+        iterations = max(5, args.iterations // 50) if name == "DrillData load" else args.iterations
+        results[name] = measure(fn, iterations)
+    if args.gunicorn:
+        results.update(gunicorn_scenarios(args.iterations, args.concurrency))
+
+    for name, r in results.items():
+        print(f"{name:<32} {r['throughput_per_s']:>10.0f} {r['p50_ms']:>9.3f} "
+              f"{r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['peak_kib']:>10.1f}")
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"process peak RSS: {max_rss / 1024:.1f} MiB")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            rounded = {name: {k: round(v, 4) for k, v in r.items()} for name, r in results.items()}
+            json.dump(rounded, f, indent=2, ensure_ascii=False, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Corpus loading benchmark for the Russian Noun Cases Drill application.
+
+Writes a synthetic corpus (by default 50k nouns and 200k sentences) as JSON
+Lines and as the original JSON documents, then loads it with the streaming
+corpus.Corpus and with a plain json.load, reporting load time, retained
+bytes per entry and peak traced memory for each.
+
+    python benchmarks/bench_corpus.py
+    python benchmarks/bench_corpus.py --nouns 10000 --sentences 50000
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CASES = ("родительный", "дательный", "винительный", "творительный", "предложный")
+ALPHABET = "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+
+
+def write_corpus(directory: str, noun_count: int, sentence_count: int, seed: int = 0):
+    """Write the synthetic corpus in both formats and return the four paths."""
+    rng = random.Random(seed)
+    nouns = list(dict.fromkeys(
+        "".join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 12))) for _ in range(noun_count)
+    ))
+    sentences = []
+    for _ in range(sentence_count):
+        words = [rng.choice(nouns) for _ in range(rng.randint(4, 12))]
+        sentences.append({
+            "case": rng.choice(CASES),
+            "sentence": " ".join(words).capitalize() + ".",
+            "word_index": rng.randint(1, len(words)),
+        })
+
+    paths = {name: os.path.join(directory, name) for name in
+             ("nouns.jsonl", "sentences.jsonl", "nouns.json", "sentences.json")}
+    with open(paths["nouns.jsonl"], "w", encoding="utf-8") as f:
+        for noun in nouns:
+            f.write(json.dumps(noun, ensure_ascii=False) + "\n")
+    with open(paths["sentences.jsonl"], "w", encoding="utf-8") as f:
+        for entry in sentences:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    buckets = {}
+    for entry in sentences:
+        buckets.setdefault(entry["case"], []).append(
+            {"sentence": entry["sentence"], "word_index": entry["word_index"]})
+    with open(paths["nouns.json"], "w", encoding="utf-8") as f:
+        json.dump({"top_nouns": nouns}, f, ensure_ascii=False)
+    with open(paths["sentences.json"], "w", encoding="utf-8") as f:
+        json.dump({"insert_sentences": buckets}, f, ensure_ascii=False)
+    return paths, len(nouns) + len(sentences)
+
+
+def load_plain(nouns_path: str, sentences_path: str):
+    """What DrillData did before: json.load both documents and keep them."""
+    with open(nouns_path, encoding="utf-8") as f:
+        nouns = json.load(f)["top_nouns"]
+    with open(sentences_path, encoding="utf-8") as f:
+        sentences = json.load(f)["insert_sentences"]
+    return nouns, sentences
+
+
+def load_streaming(nouns_path: str, sentences_path: str):
+    from corpus import Corpus
+
+    return Corpus(nouns_path, sentences_path).load()
+
+
+def measure(fn, *args):
+    """Return (seconds, retained bytes, peak bytes) for building fn(*args)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, current, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark corpus loading memory and time.")
+    parser.add_argument("--nouns", type=int, default=50000, help="Synthetic nouns")
+    parser.add_argument("--sentences", type=int, default=200000, help="Synthetic sentences")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths, entries = write_corpus(directory, args.nouns, args.sentences)
+        runs = {
+            "json.load (.json)": (load_plain, paths["nouns.json"], paths["sentences.json"]),
+            "Corpus (.json)": (load_streaming, paths["nouns.json"], paths["sentences.json"]),
+            "Corpus (.jsonl)": (load_streaming, paths["nouns.jsonl"], paths["sentences.jsonl"]),
+        }
+        print(f"{entries} entries")
+        print(f"{'loader':<20} {'seconds':>8} {'retained MiB':>13} {'bytes/entry':>12} {'peak MiB':>9}")
+        for name, (fn, *fn_args) in runs.items():
+            elapsed, current, peak = measure(fn, *fn_args)
+            print(f"{name:<20} {elapsed:>8.2f} {current / 2**20:>13.1f} "
+                  f"{current / entries:>12.0f} {peak / 2**20:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Paradigm store benchmark for the Russian Noun Cases Drill application.
+
+Takes adjectives and verbs from the pymorphy3 dictionary (plus the
+personal pronouns) and indexes them two ways:
+
+    ParadigmStore  one lexeme call per lemma, interned tag ids, array tables
+    per-slot dict  one inflect call per lemma and slot plus one parse per
+                   form, kept as {lemma: {slot: form}} and {form: slots},
+                   as DeclensionIndex does for nouns
+
+and reports analyzer calls, build time, retained memory and the cost of a
+form lookup and a reverse lookup.
+
+    python benchmarks/bench_lexicon.py
+    python benchmarks/bench_lexicon.py --words 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_corpus import measure  # noqa: E402
+
+PRONOUNS = ["я", "ты", "он", "она", "оно", "мы", "вы", "они"]
+# Lemmas that are names or otherwise not useful drill words
+EXCLUDED = frozenset({"Abbr", "Erro", "Dist", "Infr", "Slng", "Arch", "Name", "Surn", "Patr", "Geox", "Orgn"})
+
+
+class CountingMorphology:
+    """Morphology wrapper counting analyzer calls."""
+
+    def __init__(self, morph):
+        self.morph = morph
+        self.calls = 0
+
+    def lexeme(self, word, pos):
+        self.calls += 1
+        return self.morph.lexeme(word, pos)
+
+    def lexeme_many(self, items):
+        return [self.lexeme(*item) for item in items]
+
+    def inflect(self, word, grammemes):
+        self.calls += 1
+        parsed = self.morph.analyzer.parse(word)[0].inflect(set(grammemes))
+        return parsed.word if parsed else None
+
+    def readings(self, word):
+        self.calls += 1
+        return frozenset(frozenset(str(g) for g in parse.tag.grammemes) for parse in self.morph.analyzer.parse(word))
+
+
+def dictionary_words(analyzer, count: int):
+    """Return {'adjective': [...], 'verb': [...]} with `count` lemmas each."""
+    wanted = {"ADJF": "adjective", "INFN": "verb"}
+    words = {name: [] for name in wanted.values()}
+    dictionary = analyzer.dictionary
+    for word, (para_id, index) in dictionary.words.iteritems(""):
+        if index:
+            continue
+        tag = dictionary.build_tag_info(para_id, index)
+        name = wanted.get(tag.POS)
+        if name and len(words[name]) < count and tag.grammemes.isdisjoint(EXCLUDED):
+            words[name].append(word)
+            if all(len(lemmas) >= count for lemmas in words.values()):
+                break
+    words["pronoun"] = list(PRONOUNS)
+    return words
+
+
+def build_dicts(morph, words):
+    """Index the words slot by slot, as DeclensionIndex does for nouns."""
+    from lexicon import PARTS_OF_SPEECH
+
+    paradigms = {}
+    readings = {}
+    for name, lemmas in words.items():
+        pos = PARTS_OF_SPEECH[name]
+        table = paradigms[name] = {}
+        for lemma in lemmas:
+            forms = {}
+            for index, slot in enumerate(pos.slots):
+                form = morph.inflect(lemma, slot)
+                if form:
+                    forms[index] = form
+                    if form not in readings:
+                        readings[form] = morph.readings(form)
+            table[lemma] = forms
+    return paradigms, readings
+
+
+def time_lookups(fn, items) -> float:
+    """Return nanoseconds per call of fn over items."""
+    start = time.perf_counter()
+    for item in items:
+        fn(*item)
+    return (time.perf_counter() - start) / len(items) * 1e9
+
+
+def main(argv=None):
+    from lexicon import PARTS_OF_SPEECH, ParadigmStore
+    from morphology import Morphology, get_analyzer
+
+    parser = argparse.ArgumentParser(description="Compare the paradigm store with per-slot dicts.")
+    parser.add_argument("--words", type=int, default=300, help="Adjectives and verbs each")
+    parser.add_argument("--lookups", type=int, default=50000, help="Timed lookups per structure")
+    args = parser.parse_args(argv)
+
+    analyzer = get_analyzer()
+    words = dictionary_words(analyzer, args.words)
+    lemma_count = sum(len(lemmas) for lemmas in words.values())
+    print(f"{lemma_count} lemmas: " + ", ".join(f"{len(v)} {k}s" for k, v in words.items()))
+
+    print(f"{'structure':<15} {'analyzer calls':>15} {'seconds':>8} {'retained MiB':>13} "
+          f"{'bytes/lemma':>12} {'form ns':>8} {'reverse ns':>11}")
+    rng = random.Random(0)
+
+    counting = CountingMorphology(Morphology(analyzer))
+    elapsed, current, _ = measure(ParadigmStore, counting, words)
+    store = ParadigmStore(Morphology(analyzer), words)
+    queries = []
+    for _ in range(args.lookups):
+        name = rng.choice(list(store.tables))
+        queries.append((name, rng.randrange(len(store.lemmas(name))), rng.randrange(len(PARTS_OF_SPEECH[name].slots))))
+    reverse = [(name, store.forms[rng.randrange(len(store.forms))]) for name, _, _ in queries]
+    print(f"{'ParadigmStore':<15} {counting.calls:>15} {elapsed:>8.2f} {current / 2**20:>13.1f} "
+          f"{current / lemma_count:>12.0f} {time_lookups(store.form, queries):>8.0f} "
+          f"{time_lookups(store.readings, reverse):>11.0f}")
+
+    counting = CountingMorphology(Morphology(analyzer))
+    elapsed, current, _ = measure(build_dicts, counting, words)
+    paradigms, readings = build_dicts(CountingMorphology(Morphology(analyzer)), words)
+    lemma_lists = {name: list(table) for name, table in paradigms.items()}
+
+    def dict_form(name, lemma_position, slot_index):
+        return paradigms[name][lemma_lists[name][lemma_position]].get(slot_index)
+
+    def dict_readings(name, form):
+        return readings.get(form)
+
+    print(f"{'per-slot dict':<15} {counting.calls:>15} {elapsed:>8.2f} {current / 2**20:>13.1f} "
+          f"{current / lemma_count:>12.0f} {time_lookups(dict_form, queries):>8.0f} "
+          f"{time_lookups(dict_readings, reverse):>11.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark for the process-pool morphology service.
+
+Starts morph_service.MorphServer with 1, 2, 4 and 8 analyzer processes and
+measures analyzer throughput with several concurrent clients sending
+batched inflect requests, against a single in-process Morphology.
+
+    python benchmarks/bench_morph_service.py [--batch 64] [--seconds 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import DrillData  # noqa: E402
+from morph_service import MorphClient, MorphServer  # noqa: E402
+from morphology import Morphology, get_analyzer  # noqa: E402
+from paradigms import CASES, NUMBERS  # noqa: E402
+
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def workload():
+    nouns = DrillData().top_nouns
+    return [(noun, case, number) for noun in nouns for case in CASES for number in NUMBERS]
+
+
+def run_clients(make_call, clients: int, seconds: float) -> float:
+    """Run make_call() in parallel threads for a fixed time; return calls/s."""
+    done = [0] * clients
+    stop = time.perf_counter() + seconds
+
+    def loop(i):
+        call = make_call()
+        while time.perf_counter() < stop:
+            done[i] += call()
+
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(done) / seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the morphology service.")
+    parser.add_argument("--batch", type=int, default=64, help="Items per request")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duration per configuration")
+    args = parser.parse_args(argv)
+
+    items = workload()
+    batch = (items * (args.batch // len(items) + 1))[:args.batch]
+
+    local = Morphology(get_analyzer())
+
+    def local_call():
+        def call():
+            for item in batch:
+                local.inflect(*item)
+            return len(batch)
+        return call
+
+    print(f"{os.cpu_count()} CPUs, batches of {args.batch} inflect calls")
+    print(f"{'configuration':<28} {'inflections/s':>14}")
+    print(f"{'in-process, 4 threads':<28} {run_clients(local_call, 4, args.seconds):>14.0f}")
+
+    for workers in WORKER_COUNTS:
+        address = os.path.join(tempfile.gettempdir(), f"noun-drill-bench-{os.getpid()}-{workers}.sock")
+        server = MorphServer(address, workers)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        while not os.path.exists(address):
+            time.sleep(0.05)
+        # Warm every pool process before measuring
+        MorphClient(address).inflect_many(batch * workers)
+
+        def service_call():
+            client = MorphClient(address)
+
+            def call():
+                client.inflect_many(batch)
+                return len(batch)
+            return call
+
+        rate = run_clients(service_call, 2 * workers, args.seconds)
+        print(f"{f'service, {workers} workers':<28} {rate:>14.0f}")
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
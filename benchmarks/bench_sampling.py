@@ -0,0 +1,47 @@
+"""
+Benchmark for weighted sampling in the Russian Noun Cases Drill application.
+
+Shows that the cost of a draw from an AliasTable stays flat as the corpus
+grows, compared with rebuilding a list and using random.choices per call.
+
+    python benchmarks/bench_sampling.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sampling import AliasTable, zipf_weights  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DRAWS = 200_000
+
+
+def per_call_ns(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    print(f"{'entries':>10} {'build ms':>10} {'alias ns/draw':>14} {'choices ns/draw':>16}")
+    for size in SIZES:
+        weights = zipf_weights(size)
+
+        start = time.perf_counter()
+        table = AliasTable(weights)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        alias_ns = per_call_ns(table.sample, DRAWS)
+        # random.choices recomputes the cumulative weights on every call
+        choices_ns = per_call_ns(lambda: random.choices(range(size), weights), max(10, DRAWS // size))
+
+        print(f"{size:>10} {build_ms:>10.1f} {alias_ns:>14.0f} {choices_ns:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
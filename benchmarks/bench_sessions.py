@@ -0,0 +1,110 @@
+"""
+Session backend benchmark for the Russian Noun Cases Drill application.
+
+Builds the app once per session backend (cookie, memory, sqlite) and drives
+small routes that ignore, read or write the session, with many simulated
+users whose sessions carry a drill-progress payload of configurable size.
+Requests are spread over concurrent threads; the report shows throughput
+and latency percentiles per backend and route.
+
+    python benchmarks/bench_sessions.py
+    python benchmarks/bench_sessions.py --users 2000 --payload 200
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_app import percentile  # noqa: E402
+
+
+def build_app(backend: str, db_path: str):
+    from flask import session
+
+    from app import create_app
+    from config import Config
+
+    class BenchConfig(Config):
+        SESSION_BACKEND = backend
+        SESSION_DB = db_path
+        DEBUG = False
+        TESTING = True
+
+    app = create_app(BenchConfig)
+
+    @app.route('/bench/none')
+    def bench_none():
+        return "ok"
+
+    @app.route('/bench/read')
+    def bench_read():
+        return session.get('lang', 'en')
+
+    @app.route('/bench/write')
+    def bench_write():
+        session['answers'] = session.get('answers', 0) + 1
+        return "ok"
+
+    return app
+
+
+def run(app, users: int, payload: int, requests: int, concurrency: int):
+    """Return {route: (throughput, p50 ms, p99 ms)} for one backend."""
+    from flask import session
+
+    @app.route('/bench/seed')
+    def bench_seed():
+        session['lang'] = 'ru'
+        session['progress'] = [[f"слово{i}", "gent", "sing", 2.5, i] for i in range(payload)]
+        return "ok"
+
+    clients = [app.test_client() for _ in range(users)]
+    for client in clients:
+        client.get('/bench/seed')
+
+    results = {}
+    for route in ('/bench/none', '/bench/read', '/bench/write'):
+        cycle = itertools.cycle(clients)
+
+        def call(_):
+            client = next(cycle)
+            t0 = time.perf_counter()
+            response = client.get(route)
+            assert response.status_code == 200, (route, response.status_code)
+            return time.perf_counter() - t0
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            start = time.perf_counter()
+            latencies = sorted(pool.map(call, range(requests)))
+            elapsed = time.perf_counter() - start
+        results[route] = (requests / elapsed, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare cookie and server-side sessions.")
+    parser.add_argument("--users", type=int, default=500, help="Simulated users, one session each")
+    parser.add_argument("--payload", type=int, default=50, help="Progress entries stored per session")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent request threads")
+    args = parser.parse_args(argv)
+
+    print(f"{'backend':<8} {'route':<13} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in ('cookie', 'memory', 'sqlite'):
+            app = build_app(backend, os.path.join(directory, 'sessions.sqlite3'))
+            for route, (throughput, p50, p99) in run(
+                    app, args.users, args.payload, args.requests, args.concurrency).items():
+                print(f"{backend:<8} {route:<13} {throughput:>8.0f} {p50:>8.3f} {p99:>8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Startup benchmark for the Russian Noun Cases Drill application.
+
+Starts fresh interpreters in each init mode (eager, LAZY_INIT, and
+LAZY_INIT with PREWARM) and measures how long importing the app, running
+create_app and serving the first home page and the first drill page take.
+Time to first request is measured from interpreter start to the end of
+each first response. Corpus settings (NOUNS_FILE, DRILL_PACK, ...) are
+passed through from the environment.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "eager": {"LAZY_INIT": "0", "PREWARM": "0"},
+    "lazy": {"LAZY_INIT": "1", "PREWARM": "0"},
+    "lazy+prewarm": {"LAZY_INIT": "1", "PREWARM": "1"},
+}
+
+
+def child(started: float):
+    """Run inside the fresh interpreter: time startup and the first requests."""
+    sys.path.insert(0, ROOT)
+    import_start = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    client = app.test_client()
+    assert client.get('/').status_code == 200
+    first_home = time.perf_counter()
+    assert client.get('/forward_drill').status_code == 200
+    first_drill = time.perf_counter()
+    # perf_counter is system-wide on Linux, so the parent's stamp lines up
+    print(json.dumps({
+        "import": imported - import_start,
+        "create_app": created - imported,
+        "first /": first_home - created,
+        "first drill": first_drill - first_home,
+        "to first /": first_home - started,
+        "to first drill": first_drill - started,
+    }))
+
+
+def run(mode: str) -> dict:
+    """Start one interpreter in a mode and return its timings in seconds."""
+    env = dict(os.environ, **MODES[mode])
+    env.pop("STARTUP_PROFILE", None)
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", repr(started)],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure app startup and time to first request.")
+    parser.add_argument("--runs", type=int, default=5, help="Interpreters started per mode")
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child is not None:
+        child(args.child)
+        return 0
+
+    columns = ("import", "create_app", "first /", "first drill", "to first /", "to first drill")
+    print(f"median of {args.runs} runs, ms")
+    print(f"{'mode':<14}" + "".join(f"{column:>16}" for column in columns))
+    for mode in MODES:
+        runs = [run(mode) for _ in range(args.runs)]
+        print(f"{mode:<14}" + "".join(
+            f"{statistics.median(r[column] for r in runs) * 1000:>16.1f}" for column in columns))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
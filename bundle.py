@@ -0,0 +1,170 @@
+"""
+Client-side drill bundle for the Russian Noun Cases Drill application.
+
+Exports everything the drills need (nouns and their paradigms, the
+(case, number) pairs every form can express, the preprocessed insert
+drill sentences, the UI translations and the answer normalization rules)
+as one compact JSON document, so the browser can generate and check
+questions without a server round trip. The bundle is named after a hash
+of its content and written next to gzip and, when the brotli package is
+installed, brotli precompressed copies; manifest.json names the current
+bundle and index.html is the static drill page.
+
+Build a bundle with:
+
+    python bundle.py data/bundle
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Dict, Tuple
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from answers import normalization_rules
+from paradigms import CASE_VARIANTS, CASES, NUMBERS
+from utils import get_translations
+
+try:
+    import brotli
+except ImportError:  # optional; only .gz copies are written without it
+    brotli = None
+
+FORMAT_VERSION = 2
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+
+def pair_bit(case: str, number: str) -> int:
+    """Bit of a (case, number) pair in the bundle's form masks, or 0."""
+    case = CASE_VARIANTS.get(case, case)
+    if case not in CASES or number not in NUMBERS:
+        return 0
+    return 1 << (CASES.index(case) * len(NUMBERS) + NUMBERS.index(number))
+
+
+def build_bundle(drill_data, declensions, sentences) -> Dict[str, Any]:
+    """
+    Collect the drill corpus into a JSON-serializable bundle.
+
+    Args:
+        drill_data: DrillData instance holding the corpus
+        declensions: DeclensionIndex covering drill_data.top_nouns
+        sentences: SentenceIndex over drill_data.insert_sentences
+
+    Returns:
+        The bundle without its version
+    """
+    nouns = list(drill_data.top_nouns)
+    form_ids: Dict[str, int] = {}
+    form_masks = []
+    # len(CASES) * len(NUMBERS) form ids per noun, -1 where there is no form
+    paradigms = []
+    for noun in nouns:
+        for case in CASES:
+            for number in NUMBERS:
+                form = declensions.inflect(noun, case, number)
+                if form is None:
+                    paradigms.append(-1)
+                    continue
+                if form not in form_ids:
+                    form_ids[form] = len(form_ids)
+                    mask = 0
+                    for pair in declensions.case_number_pairs(form):
+                        mask |= pair_bit(*pair)
+                    form_masks.append(mask)
+                paradigms.append(form_ids[form])
+
+    buckets = []
+    for bucket, entries in drill_data.insert_sentences.items():
+        rows = []
+        for position in range(len(entries)):
+            question = sentences.get(bucket, position)
+            rows.append([question.blank_sentence, question.answer, question.normal_form, question.number,
+                         sorted(question.lemma_forms)])
+        if rows:
+            buckets.append({"name": bucket, "case": sentences.get(bucket, 0).case, "sentences": rows})
+
+    translations = {}
+    for lang in ('en', 'ru'):
+        t, case_options, number_options = get_translations(lang)
+        translations[lang] = {"t": dict(t), "cases": dict(case_options), "numbers": dict(number_options)}
+
+    return {
+        "format": FORMAT_VERSION,
+        "cases": list(CASES),
+        "numbers": list(NUMBERS),
+        "nouns": nouns,
+        "forms": list(form_ids),
+        "form_masks": form_masks,
+        "paradigms": paradigms,
+        "insert_sentences": buckets,
+        "translations": translations,
+        "normalize": normalization_rules(),
+    }
+
+
+def write_bundle(output_dir: str, bundle: Dict[str, Any],
+                 static_url: str = "/static") -> Tuple[str, Dict[str, int]]:
+    """
+    Write a versioned bundle, its compressed copies, the manifest and the page.
+
+    Args:
+        output_dir: Directory to write into
+        bundle: The bundle from build_bundle
+        static_url: URL prefix of the app's static files, for the page
+
+    Returns:
+        A tuple containing (bundle file name, {file name: size in bytes})
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    body = json.dumps(bundle, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    version = hashlib.sha256(body).hexdigest()[:16]
+    name = f"drill-{version}.json"
+
+    files = {name: body, name + ".gz": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        files[name + ".br"] = brotli.compress(body, quality=11)
+    manifest = {"format": FORMAT_VERSION, "version": version, "bundle": name, "size": len(body)}
+    files["manifest.json"] = json.dumps(manifest, indent=2).encode("utf-8") + b"\n"
+
+    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape())
+    t, _, _ = get_translations('en')
+    files["index.html"] = env.get_template("client_drill.html").render(t=t, static_url=static_url).encode("utf-8")
+
+    for file_name, data in files.items():
+        # Write aside and rename so a running server never serves a partial file
+        path = os.path.join(output_dir, file_name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+    return name, {file_name: len(data) for file_name, data in files.items()}
+
+
+def main(argv=None):
+    """Build the client-side drill bundle from the corpus."""
+    from config import Config
+    from models import DrillData
+    from morphology import Morphology, get_analyzer
+    from paradigms import DeclensionIndex, SentenceIndex
+
+    parser = argparse.ArgumentParser(description="Export the drill corpus for the client-side drill.")
+    parser.add_argument("output", help="Directory to write the bundle into")
+    args = parser.parse_args(argv)
+
+    morph = Morphology(get_analyzer())
+    drill_data = DrillData(nouns_file=Config.NOUNS_FILE, sentences_file=Config.SENTENCES_FILE)
+    declensions = DeclensionIndex(morph, drill_data.top_nouns)
+    sentences = SentenceIndex(morph, drill_data.insert_sentences)
+    name, sizes = write_bundle(args.output, build_bundle(drill_data, declensions, sentences))
+    for file_name in sorted(sizes):
+        if file_name.startswith(name):
+            print(f"{file_name}: {sizes[file_name]} bytes")
+    print(f"Wrote {name} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
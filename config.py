@@ -3,6 +3,7 @@ Configuration settings for the Russian Noun Cases Drill application.
 """
 
 import os
+import stat
 
 # Flask application settings
 class Config:
@@ -13,3 +14,103 @@ class Config:
     # Application settings
     DEFAULT_LANGUAGE = 'en'
     SUPPORTED_LANGUAGES = ['en', 'ru']
+
+    # Optional binary drill pack built with `python pack.py <path>`
+    DRILL_PACK = os.environ.get('DRILL_PACK')
+
+    # Corpus files, as .jsonl (streamed) or the original .json documents;
+    # empty for data/nouns.json and data/sentences.json
+    NOUNS_FILE = os.environ.get('NOUNS_FILE')
+    SENTENCES_FILE = os.environ.get('SENTENCES_FILE')
+    # Adjective, pronoun and verb word lists; empty for data/words.json
+    WORDS_FILE = os.environ.get('WORDS_FILE')
+    # Seconds between checks for changed corpus files (0 disables hot reload)
+    CORPUS_RELOAD_INTERVAL = float(os.environ.get('CORPUS_RELOAD_INTERVAL', 0))
+
+    # SQLite file holding learners' spaced-repetition state; empty (the
+    # default) disables scheduling and the forward drill picks nouns at random
+    REVIEW_DB = os.environ.get('REVIEW_DB', '')
+    # Seconds in one SM-2 interval unit, and before a wrong answer is retried
+    REVIEW_INTERVAL_SECONDS = float(os.environ.get('REVIEW_INTERVAL_SECONDS', 86400))
+    REVIEW_RELEARN_SECONDS = float(os.environ.get('REVIEW_RELEARN_SECONDS', 60))
+
+    # 'cookie' (Flask's signed cookie), 'memory' (in-process, one worker) or
+    # 'sqlite' (SESSION_DB, shared by all workers); server-side sessions
+    # keep only an id in the cookie and are loaded on first access
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cookie')
+    # SQLite file for the 'sqlite' backend, which requires it; keep it in a
+    # directory only the app's user can write to, not the shared temp dir
+    SESSION_DB = os.environ.get('SESSION_DB', '')
+    # Sessions kept decoded in each worker
+    SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', 10000))
+
+    # Directory of the client-side drill bundle built with `python bundle.py <dir>`,
+    # served under /bundle/ with precompressed copies picked by Accept-Encoding
+    BUNDLE_DIR = os.environ.get(
+        'BUNDLE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bundle')
+    )
+
+    # Defer loading the analyzer and drill data until the first request
+    # that needs them (init_routes), for fast restarts without preload_app
+    LAZY_INIT = os.environ.get('LAZY_INIT', '0') == '1'
+    # Run one synthetic request through every drill in create_app, so
+    # workers start serving with everything loaded and cached
+    PREWARM = os.environ.get('PREWARM', '0') == '1'
+
+    # Reuse one process-wide MorphAnalyzer across app instances, so a
+    # gunicorn master with preload_app loads it once for all workers
+    SHARE_ANALYZER = True
+
+    # Unix socket of a running morph_service.py; when set, web workers send
+    # analyzer work there instead of loading their own MorphAnalyzer
+    MORPH_SERVICE = os.environ.get('MORPH_SERVICE')
+    MORPH_SERVICE_AUTHKEY = os.environ.get('MORPH_SERVICE_AUTHKEY')
+
+    # Entries kept per analyzer operation (parse, inflect, normal_form)
+    MORPH_CACHE_SIZE = int(os.environ.get('MORPH_CACHE_SIZE', 10000))
+
+    # Upper bound on questions returned by one /api/questions call
+    MAX_BATCH_SIZE = 100
+
+    # 'uniform' or 'frequency' (favour common nouns)
+    NOUN_SAMPLING = os.environ.get('NOUN_SAMPLING', 'uniform')
+    # 'balanced' (every case equally often) or 'proportional' (by sentence count)
+    SENTENCE_SAMPLING = os.environ.get('SENTENCE_SAMPLING', 'balanced')
+
+    # Keep compiled Jinja2 bytecode on disk, in TEMPLATE_CACHE_DIR or, when
+    # that is empty, in Jinja's own per-user directory (created 0700 and
+    # checked for ownership); an explicit directory must be private as well
+    TEMPLATE_BYTECODE_CACHE = os.environ.get('TEMPLATE_BYTECODE_CACHE', '1') == '1'
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR', '')
+    # Render the home page once per language and serve it with an ETag
+    CACHE_HOME_PAGE = True
+    # Cache-Control max-age (seconds) for the cached home page
+    HOME_PAGE_MAX_AGE = 300
+
+    # ASGI mode (asgi.py): threads running Flask handlers, requests allowed
+    # to queue for a thread before answering 503, and the request body limit
+    ASGI_WORKER_THREADS = int(os.environ.get('ASGI_WORKER_THREADS', 8))
+    ASGI_MAX_PENDING = int(os.environ.get('ASGI_MAX_PENDING', 64))
+    ASGI_MAX_BODY_SIZE = 1024 * 1024
+
+    # Fraction of requests to run under cProfile (0 disables profiling);
+    # profiles are written to PROFILE_DIR as <endpoint>-<time>-<pid>.prof,
+    # which profiling requires and which must be private (private_directory)
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', '')
+
+
+def private_directory(path: str) -> str:
+    """
+    Create `path` accessible only to this user, or check that it already is.
+
+    Files read back from these directories (compiled templates, profiles)
+    must not be plantable by other users, so a directory owned by someone
+    else or open to group or others, such as a fixed name another user
+    created first in the shared temp dir, is refused.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise ValueError(f"{path} must be a directory owned by this user with mode 0700")
+    return path
@@ -0,0 +1,305 @@
+"""
+Streaming corpus loading for the Russian Noun Cases Drill application.
+
+Large corpora are stored as JSON Lines and read one entry at a time, so
+loading never holds the whole parsed document in memory:
+
+    nouns.jsonl:      "слово"   or   {"noun": "слово"}
+    sentences.jsonl:  {"case": "родительный", "sentence": "Я живу далеко от школы.", "word_index": 5}
+    words.jsonl:      {"pos": "verb", "word": "читать"}
+
+The original nouns.json / sentences.json documents are still accepted, and
+words.json maps each part of speech to a list of words.
+Entries are validated as they arrive; invalid ones are skipped and
+reported. Strings are interned, sentences are kept as __slots__ records in
+one list, and each case bucket is an array of record indices.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Any, Container, Dict, Iterator, List, Optional, Tuple
+
+_decode = json.JSONDecoder().decode
+
+
+class SentenceRecord:
+    """One insert drill sentence; supports read-only dict-style access."""
+
+    __slots__ = ("sentence", "word_index")
+
+    def __init__(self, sentence: str, word_index: int):
+        self.sentence = sentence
+        self.word_index = word_index
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def __repr__(self) -> str:
+        return f"SentenceRecord({self.sentence!r}, {self.word_index})"
+
+
+class SentenceBucket(Sequence):
+    """Sequence view of the sentences of one case, backed by an index array."""
+
+    def __init__(self, records: List[SentenceRecord], indices: array):
+        self._records = records
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._records[i] for i in self._indices[index]]
+        return self._records[self._indices[index]]
+
+
+def _iter_json_lines(path: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, decoded value) for every non-blank line."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, _decode(line)
+            except json.JSONDecodeError as e:
+                yield line_no, e
+
+
+def iter_noun_entries(path: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, raw entry) from a nouns .jsonl or .json file."""
+    if path.endswith(".jsonl"):
+        yield from _iter_json_lines(path)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for i, noun in enumerate(data.get("top_nouns", []), 1):
+        yield i, noun
+
+
+def iter_sentence_entries(path: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, raw entry with a 'case' key) from a sentences file."""
+    if path.endswith(".jsonl"):
+        yield from _iter_json_lines(path)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    i = 0
+    for case, entries in data.get("insert_sentences", {}).items():
+        for entry in entries:
+            i += 1
+            yield i, dict(entry, case=case) if isinstance(entry, dict) else entry
+
+
+def iter_word_entries(path: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, raw entry with a 'pos' key) from a words file."""
+    if path.endswith(".jsonl"):
+        yield from _iter_json_lines(path)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    i = 0
+    for pos, words in data.items():
+        for word in words if isinstance(words, list) else [words]:
+            i += 1
+            yield i, {"pos": pos, "word": word}
+
+
+def validate_noun(raw: Any) -> Tuple[Optional[str], str]:
+    """Return (noun, "") for a valid entry or (None, reason)."""
+    if isinstance(raw, dict):
+        raw = raw.get("noun")
+    if not isinstance(raw, str) or not raw.strip():
+        return None, "noun must be a non-empty string"
+    noun = raw.strip()
+    if any(c.isspace() for c in noun):
+        return None, f"noun {noun!r} contains whitespace"
+    return noun, ""
+
+
+def validate_sentence(raw: Any) -> Tuple[Optional[Tuple[str, SentenceRecord]], str]:
+    """Return ((case, record), "") for a valid entry or (None, reason)."""
+    if not isinstance(raw, dict):
+        return None, "sentence entry must be an object"
+    case, sentence, word_index = raw.get("case"), raw.get("sentence"), raw.get("word_index")
+    if not isinstance(case, str) or not case:
+        return None, "missing case"
+    if not isinstance(sentence, str) or not sentence.strip():
+        return None, "sentence must be a non-empty string"
+    if not isinstance(word_index, int) or isinstance(word_index, bool):
+        return None, "word_index must be an integer"
+    if not 1 <= word_index <= len(sentence.split()):
+        return None, f"word_index {word_index} is outside the sentence"
+    return (case, SentenceRecord(sentence, word_index)), ""
+
+
+def validate_word(raw: Any, parts_of_speech: Container[str]) -> Tuple[Optional[Tuple[str, str]], str]:
+    """Return ((part of speech, word), "") for a valid entry or (None, reason)."""
+    if not isinstance(raw, dict):
+        return None, "word entry must be an object"
+    pos, word = raw.get("pos"), raw.get("word")
+    if pos not in parts_of_speech:
+        return None, f"unknown part of speech {pos!r}"
+    if not isinstance(word, str) or not word.strip():
+        return None, "word must be a non-empty string"
+    word = word.strip()
+    if any(c.isspace() for c in word):
+        return None, f"word {word!r} contains whitespace"
+    return (pos, word), ""
+
+
+def load_words(path: str, parts_of_speech: Container[str]) -> Dict[str, List[str]]:
+    """
+    Read the word lists of the adjective, pronoun and verb drills.
+
+    Args:
+        path: Path of the words .jsonl or .json file
+        parts_of_speech: Names of the parts of speech that can be drilled
+
+    Returns:
+        Part of speech -> distinct words in file order; empty if the file
+        is missing
+    """
+    words: Dict[str, List[str]] = {}
+    seen, skipped = set(), []
+    try:
+        for line_no, raw in iter_word_entries(path):
+            entry, reason = (None, str(raw)) if isinstance(raw, Exception) else validate_word(raw, parts_of_speech)
+            if entry is None:
+                skipped.append(f"entry {line_no}: {reason}")
+            elif entry not in seen:
+                seen.add(entry)
+                words.setdefault(entry[0], []).append(sys.intern(entry[1]))
+    except FileNotFoundError:
+        pass
+    except json.JSONDecodeError as e:
+        print(f"Error loading words: {e}")
+    if skipped:
+        print(f"Skipped {len(skipped)} invalid entries in {path}; first: {skipped[0]}")
+    return words
+
+
+def _file_signature(path: str) -> Optional[Tuple[float, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime, st.st_size
+
+
+class Corpus:
+    """Class to stream, validate and hold the noun and sentence corpus."""
+
+    def __init__(self, nouns_path: str, sentences_path: str):
+        """
+        Args:
+            nouns_path: Path of the nouns .jsonl or .json file
+            sentences_path: Path of the sentences .jsonl or .json file
+        """
+        self.nouns_path = nouns_path
+        self.sentences_path = sentences_path
+        self.nouns: List[str] = []
+        self.sentences: List[SentenceRecord] = []
+        self.insert_sentences: Dict[str, SentenceBucket] = {}
+        self.skipped = 0
+        # Hex digest of the loaded nouns and sentences, in order
+        self.digest = ""
+        self._signature = None
+
+    def load(self, strict: bool = False) -> "Corpus":
+        """
+        Read both files, replacing whatever was loaded before.
+
+        Args:
+            strict: Raise instead of reporting a missing or malformed file,
+                an undecodable line (as a half-written .jsonl ends with) or
+                a file without valid entries; for reloads, which keep the
+                corpus they already have rather than fall back to nothing
+        """
+        self._signature = self.signature()
+        self.skipped = 0
+        self.nouns = self._load_nouns(strict)
+        self.sentences, self.insert_sentences = self._load_sentences(strict)
+        if strict and not self.nouns:
+            raise ValueError(f"{self.nouns_path} has no valid nouns")
+        if strict and not self.sentences:
+            raise ValueError(f"{self.sentences_path} has no valid sentences")
+        self.digest = self._digest()
+        return self
+
+    def _digest(self) -> str:
+        """Hash what corpus positions refer to, so two loads agree only if positions do."""
+        h = hashlib.blake2b(digest_size=8)
+        for noun in self.nouns:
+            h.update(noun.encode("utf-8") + b"\n")
+        for case, bucket in self.insert_sentences.items():
+            h.update(b"\0" + case.encode("utf-8") + b"\n")
+            for record in bucket:
+                h.update(f"{record.word_index}\t{record.sentence}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def signature(self) -> Tuple[Optional[Tuple[float, int]], Optional[Tuple[float, int]]]:
+        """Return the (mtime, size) of both files as they are on disk now."""
+        return _file_signature(self.nouns_path), _file_signature(self.sentences_path)
+
+    def changed(self) -> bool:
+        """Check whether either file was modified since the last load."""
+        return self._signature != self.signature()
+
+    def _report(self, path: str, skipped: List[str]):
+        if skipped:
+            self.skipped += len(skipped)
+            print(f"Skipped {len(skipped)} invalid entries in {path}; first: {skipped[0]}")
+
+    def _load_nouns(self, strict: bool) -> List[str]:
+        nouns, seen, skipped = [], set(), []
+        try:
+            for line_no, raw in iter_noun_entries(self.nouns_path):
+                if strict and isinstance(raw, Exception):
+                    raise raw
+                noun, reason = (None, str(raw)) if isinstance(raw, Exception) else validate_noun(raw)
+                if noun is None:
+                    skipped.append(f"entry {line_no}: {reason}")
+                elif noun not in seen:
+                    seen.add(noun)
+                    nouns.append(sys.intern(noun))
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            if strict:
+                raise
+            print(f"Error loading nouns: {e}")
+        self._report(self.nouns_path, skipped)
+        seen.clear()
+        return nouns
+
+    def _load_sentences(self, strict: bool) -> Tuple[List[SentenceRecord], Dict[str, SentenceBucket]]:
+        records: List[SentenceRecord] = []
+        indices: Dict[str, array] = {}
+        skipped = []
+        try:
+            for line_no, raw in iter_sentence_entries(self.sentences_path):
+                if strict and isinstance(raw, Exception):
+                    raise raw
+                entry, reason = (None, str(raw)) if isinstance(raw, Exception) else validate_sentence(raw)
+                if entry is None:
+                    skipped.append(f"entry {line_no}: {reason}")
+                    continue
+                case, record = entry
+                case = sys.intern(case)
+                indices.setdefault(case, array("I")).append(len(records))
+                records.append(record)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            if strict:
+                raise
+            print(f"Error loading sentences: {e}")
+        self._report(self.sentences_path, skipped)
+        return records, {case: SentenceBucket(records, idx) for case, idx in indices.items()}
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings for the Russian Noun Cases Drill application.
+
+Run with:
+
+    gunicorn "app:create_app()"
+
+The app is imported in the master before workers are forked, so the
+pymorphy3 dictionaries, drill data and declension index are loaded once
+and shared copy-on-write by every worker. Leave LAZY_INIT off here: with
+it, each worker would load its own copy on its first drill request.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+
+def when_ready(server):
+    """Report startup timing and freeze shared state before forking."""
+    from morphology import freeze_shared_state
+    from startup import report
+
+    server.log.info(report())
+    freeze_shared_state()
@@ -0,0 +1,285 @@
+"""
+Multi-part-of-speech paradigm store for the Russian Noun Cases Drill application.
+
+Each part of speech has a fixed list of slots, the grammeme sets its drill
+asks for: case and number for nouns; case, gender, number and animacy for
+adjectives; case for personal pronouns; tense or mood, person, gender and
+number for verbs. Grammeme sets are interned as small integers shared by
+every part of speech. Each part of speech keeps its forms in one array of
+form ids, lemma by slot, so finding a form is an index computation, and
+the reverse index from a form to the slots it fills is two flat arrays
+built once over all parts of speech.
+
+A lemma costs one analyzer call (its lexeme) however many slots it has,
+and a form shared by several lemmas or parts of speech is stored once.
+"""
+
+from array import array
+from itertools import accumulate
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from answers import normalize_answer
+from morphology import Lexeme
+from paradigms import CASE_VARIANTS, CASES, NUMBERS
+
+GENDERS = ("masc", "femn", "neut")
+ANIMACY = ("anim", "inan")
+PERSONS = ("1per", "2per", "3per")
+# Tenses, with the imperative mood drilled alongside them
+TENSES = ("pres", "futr", "past", "impr")
+
+# Option axes of the drills, in the order a slot is described in
+AXES = (
+    ("tense", TENSES),
+    ("person", PERSONS),
+    ("case", CASES),
+    ("gender", GENDERS),
+    ("number", NUMBERS),
+    ("animacy", ANIMACY),
+)
+
+# Secondary spellings (новою, него, чаю) are accepted as answers but only
+# asked for when a slot has no plain form
+VARIANT_GRAMMEMES = frozenset({
+    "gen2", "loc2", "acc2", "V-oy", "V-ey", "V-be", "V-en", "V-ie", "V-bi", "V-sh", "V-ej", "Af-p",
+})
+# Never drilled or accepted: abbreviations, misspellings, informal and
+# archaic forms (видют, те), and the superlatives in adjective lexemes
+SKIPPED_GRAMMEMES = frozenset({"Abbr", "Erro", "Dist", "Infr", "Slng", "Arch", "Supr", "Cmp2"})
+
+
+class TagTable:
+    """Class to intern grammeme sets as small integers."""
+
+    def __init__(self):
+        self.ids: Dict[FrozenSet[str], int] = {}
+        self.tags: List[FrozenSet[str]] = []
+
+    def intern(self, grammemes: Iterable[str]) -> int:
+        """Return the id of a grammeme set, adding it if it is new."""
+        tag = frozenset(grammemes)
+        tag_id = self.ids.get(tag)
+        if tag_id is None:
+            tag_id = self.ids[tag] = len(self.tags)
+            self.tags.append(tag)
+        return tag_id
+
+
+# Shared by every part of speech, so a tag id names one slot of one
+# part of speech in the whole process
+TAGS = TagTable()
+
+
+class PartOfSpeech:
+    """Class to describe the slots a part of speech is drilled in."""
+
+    def __init__(self, name: str, tag: str, slots: Iterable[Iterable[str]]):
+        """
+        Args:
+            name: Name used in URLs and word lists ('verb')
+            tag: pymorphy3 POS tag of the drilled forms ('VERB')
+            slots: Grammemes of every slot, without the POS tag
+        """
+        self.name = name
+        self.tag = tag
+        # Slot index -> id of the slot's grammemes plus the POS tag
+        self.slot_tags = array("H", (TAGS.intern({tag, *slot}) for slot in slots))
+        self.slot_index: Dict[int, int] = {tag_id: index for index, tag_id in enumerate(self.slot_tags)}
+        self.slots: Tuple[FrozenSet[str], ...] = tuple(TAGS.tags[tag_id] - {tag} for tag_id in self.slot_tags)
+        # Axis -> the values some slot has, for the drill's option checkboxes
+        self.axes: Dict[str, Tuple[str, ...]] = {}
+        for axis, values in AXES:
+            used = tuple(value for value in values if any(value in slot for slot in self.slots))
+            if used:
+                self.axes[axis] = used
+
+    def matching_slots(self, selected: Iterable[str]) -> List[int]:
+        """
+        Return the indices of the slots a selection of grammemes allows.
+
+        On every axis with a selected value, a slot must have one of the
+        selected values; slots without a value on that axis (past tense
+        forms have no person) are not restricted by it.
+        """
+        selected = set(selected)
+        chosen = [(set(values), selected.intersection(values)) for values in self.axes.values()]
+        return [
+            index for index, slot in enumerate(self.slots)
+            if all(not picked or slot.isdisjoint(values) or not slot.isdisjoint(picked)
+                   for values, picked in chosen)
+        ]
+
+    def describe(self, slot_index: int, labels: Mapping[str, str]) -> str:
+        """Name a slot by its grammemes' labels, in AXES order."""
+        slot = self.slots[slot_index]
+        return ", ".join(
+            labels.get(value, value) for values in self.axes.values() for value in values if value in slot
+        )
+
+
+def _adjective_slots() -> Iterator[Set[str]]:
+    for case in CASES:
+        for gender, number in (("masc", "sing"), ("femn", "sing"), ("neut", "sing"), (None, "plur")):
+            slot = {case, number} if gender is None else {case, gender, number}
+            # The accusative of masculine and plural adjectives follows the noun's animacy
+            if case == "accs" and gender in ("masc", None):
+                for animacy in ANIMACY:
+                    yield slot | {animacy}
+            else:
+                yield slot
+
+
+NOUN = PartOfSpeech("noun", "NOUN", ({case, number} for case in CASES for number in NUMBERS))
+ADJECTIVE = PartOfSpeech("adjective", "ADJF", _adjective_slots())
+# Personal pronouns carry their person, number and gender in the lemma
+PRONOUN = PartOfSpeech("pronoun", "NPRO", ({case} for case in CASES))
+VERB = PartOfSpeech("verb", "VERB", [
+    *({tense, person, number} for tense in ("pres", "futr") for person in PERSONS for number in NUMBERS),
+    *({"past", gender, "sing"} for gender in GENDERS),
+    {"past", "plur"},
+    *({"impr", "excl", number} for number in NUMBERS),
+])
+
+PARTS_OF_SPEECH: Dict[str, PartOfSpeech] = {pos.name: pos for pos in (NOUN, ADJECTIVE, PRONOUN, VERB)}
+
+
+class ParadigmTable:
+    """Forms of the drill lemmas of one part of speech."""
+
+    def __init__(self, pos: PartOfSpeech):
+        self.pos = pos
+        self.lemmas: List[str] = []
+        self.positions: Dict[str, int] = {}
+        # lemma position * len(pos.slots) + slot index -> form id, -1 where
+        # the lemma has no form (perfective verbs have no present tense)
+        self.cells = array("i")
+        # cell -> ids of further accepted spellings, for the few cells with any
+        self.variants: Dict[int, Tuple[int, ...]] = {}
+
+
+class ParadigmStore:
+    """Class to hold the paradigms of the drill words of every part of speech."""
+
+    def __init__(self, morph, words: Mapping[str, Iterable[str]]):
+        """
+        Fetch every lemma's lexeme once and index its forms.
+
+        Args:
+            morph: The Morphology (or CachedMorphology) instance
+            words: Part of speech name -> lemmas, as DrillData.words
+        """
+        # Form id -> form, shared by every part of speech
+        self.forms: List[str] = []
+        self._form_ids: Dict[str, int] = {}
+        self.tables: Dict[str, ParadigmTable] = {}
+        # "pos:lemma" of every lemma the analyzer has no forms for
+        self.skipped: List[str] = []
+
+        for name, lemmas in words.items():
+            table = self.tables[name] = ParadigmTable(PARTS_OF_SPEECH[name])
+            lemmas = list(dict.fromkeys(lemmas))
+            # One batch per part of speech, a single round trip to a morphology service
+            lexemes = morph.lexeme_many([(lemma, table.pos.tag) for lemma in lemmas])
+            for lemma, lexeme in zip(lemmas, lexemes):
+                if not self._add(table, lemma, lexeme):
+                    self.skipped.append(f"{name}:{lemma}")
+        if self.skipped:
+            print(f"Skipped {len(self.skipped)} words without forms; first: {self.skipped[0]}")
+
+        # Form id -> tag ids of its slots, at
+        # reading_tags[reading_offsets[id]:reading_offsets[id + 1]]
+        # Homonymous lemmas can put one form in the same slot twice
+        readings = sorted(set(self._readings()))
+        counts = [0] * (len(self.forms) + 1)
+        for form_id, _ in readings:
+            counts[form_id + 1] += 1
+        self.reading_offsets = array("I", accumulate(counts))
+        self.reading_tags = array("H", (tag_id for _, tag_id in readings))
+
+    def _form_id(self, form: str) -> int:
+        form_id = self._form_ids.get(form)
+        if form_id is None:
+            form_id = self._form_ids[form] = len(self.forms)
+            self.forms.append(form)
+        return form_id
+
+    def _add(self, table: ParadigmTable, lemma: str, lexeme: Lexeme) -> bool:
+        """Add a lemma's forms from its lexeme to its table; False if it has none."""
+        pos = table.pos
+        # Slot index -> (is variant, form id) in lexeme order
+        candidates: List[List[Tuple[bool, int]]] = [[] for _ in pos.slots]
+        for word, grammemes in lexeme:
+            if not grammemes.isdisjoint(SKIPPED_GRAMMEMES):
+                continue
+            variant = not grammemes.isdisjoint(VARIANT_GRAMMEMES)
+            grammemes = frozenset(CASE_VARIANTS.get(grammeme, grammeme) for grammeme in grammemes)
+            for index, slot in enumerate(pos.slots):
+                if slot <= grammemes:
+                    candidates[index].append((variant, self._form_id(word)))
+        if not any(candidates):
+            return False
+
+        start = len(table.cells)
+        for index, found in enumerate(candidates):
+            if not found:
+                table.cells.append(-1)
+                continue
+            # The first plain spelling is the answer shown; the rest are accepted too
+            main = min(found, key=lambda candidate: candidate[0])[1]
+            table.cells.append(main)
+            others = tuple(dict.fromkeys(form_id for _, form_id in found if form_id != main))
+            if others:
+                table.variants[start + index] = others
+        table.positions[lemma] = len(table.lemmas)
+        table.lemmas.append(lemma)
+        return True
+
+    def _readings(self) -> Iterator[Tuple[int, int]]:
+        """Yield (form id, tag id) for every form of every slot in the tables."""
+        for table in self.tables.values():
+            slot_tags = table.pos.slot_tags
+            width = len(slot_tags)
+            for cell, form_id in enumerate(table.cells):
+                if form_id < 0:
+                    continue
+                tag_id = slot_tags[cell % width]
+                yield form_id, tag_id
+                for variant_id in table.variants.get(cell, ()):
+                    yield variant_id, tag_id
+
+    def lemmas(self, pos: str) -> List[str]:
+        """Return the lemmas of a part of speech, in word list order."""
+        table = self.tables.get(pos)
+        return table.lemmas if table is not None else []
+
+    def form(self, pos: str, lemma_position: int, slot_index: int) -> Optional[str]:
+        """Return the form of a lemma in a slot, or None if it has none."""
+        table = self.tables[pos]
+        form_id = table.cells[lemma_position * len(table.pos.slots) + slot_index]
+        return self.forms[form_id] if form_id >= 0 else None
+
+    def accepted_answers(self, pos: str, lemma_position: int, slot_index: int) -> FrozenSet[str]:
+        """Return the normalized spellings accepted for a lemma in a slot."""
+        table = self.tables[pos]
+        cell = lemma_position * len(table.pos.slots) + slot_index
+        form_ids = (table.cells[cell], *table.variants.get(cell, ()))
+        return frozenset(normalize_answer(self.forms[form_id]) for form_id in form_ids if form_id >= 0)
+
+    def lemma_forms(self, pos: str, lemma_position: int) -> FrozenSet[str]:
+        """Return the normalized spellings of every form of a lemma, for grading."""
+        table = self.tables[pos]
+        width = len(table.pos.slots)
+        start = lemma_position * width
+        form_ids = set(table.cells[start:start + width])
+        for cell in range(start, start + width):
+            form_ids.update(table.variants.get(cell, ()))
+        return frozenset(normalize_answer(self.forms[form_id]) for form_id in form_ids if form_id >= 0)
+
+    def readings(self, pos: str, form: str) -> FrozenSet[int]:
+        """Return the indices of every slot of a part of speech a drilled form fills."""
+        form_id = self._form_ids.get(form)
+        if form_id is None:
+            return frozenset()
+        slot_index = PARTS_OF_SPEECH[pos].slot_index
+        tags = self.reading_tags[self.reading_offsets[form_id]:self.reading_offsets[form_id + 1]]
+        return frozenset(slot_index[tag_id] for tag_id in tags if tag_id in slot_index)
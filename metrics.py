@@ -0,0 +1,290 @@
+"""
+Request timing and metrics for the Russian Noun Cases Drill application.
+
+Every request is broken into phases (session decoding, question
+generation, analyzer calls, template rendering) and recorded per route and
+action in Prometheus-style histograms and counters, exposed as text on
+/metrics. Metrics are kept per process; under gunicorn each worker reports
+its own series.
+"""
+
+import cProfile
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from flask import (Response, before_render_template, g, has_request_context, request,
+                   template_rendered)
+from flask.sessions import SecureCookieSessionInterface
+
+from config import private_directory
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels[n] for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[n] for n in self.label_names)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), series):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    labels = _format_labels(self.label_names, key, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {series[-1]:.6f}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """Class holding the application's instruments and rendering them."""
+
+    def __init__(self):
+        self.requests = Counter(
+            "drill_requests_total", "Requests handled.", ("route", "action", "status"))
+        self.request_seconds = Histogram(
+            "drill_request_seconds", "Request latency.", ("route", "action"))
+        self.phase_seconds = Histogram(
+            "drill_phase_seconds", "Time spent per request phase.", ("route", "action", "phase"))
+        self.analyzer_calls = Counter(
+            "drill_analyzer_calls_total", "Calls that reached the morphological analyzer.", ("operation",))
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """Register a callable returning extra exposition lines at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for instrument in (self.requests, self.request_seconds, self.phase_seconds, self.analyzer_calls):
+            lines.extend(instrument.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def phase(name: str):
+    """Time a phase of the current request; a no-op outside requests."""
+    if not has_request_context():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = g.setdefault("drill_phases", {})
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """Cookie session interface that records the time spent loading the session."""
+
+    def open_session(self, app, request):
+        with phase("session"):
+            return super().open_session(app, request)
+
+
+class InstrumentedMorphology:
+    """Class wrapping a Morphology backend to time and count analyzer calls."""
+
+    def __init__(self, backend, metrics: Metrics):
+        self.backend = backend
+        self.metrics = metrics
+
+    def _call(self, operation, fn, *args):
+        self.metrics.analyzer_calls.inc(operation=operation)
+        with phase("analyzer"):
+            return fn(*args)
+
+    def _call_many(self, operation, fn, items):
+        # One batch counts as one call per item, as the unbatched calls would
+        self.metrics.analyzer_calls.inc(len(items), operation=operation)
+        with phase("analyzer"):
+            return fn(items)
+
+    def inflect(self, word, case, number):
+        return self._call("inflect", self.backend.inflect, word, case, number)
+
+    def case_number_pairs(self, word):
+        return self._call("parse", self.backend.case_number_pairs, word)
+
+    def normal_form(self, word):
+        return self._call("normal_form", self.backend.normal_form, word)
+
+    def lexeme(self, word, pos):
+        return self._call("lexeme", self.backend.lexeme, word, pos)
+
+    def inflect_many(self, items):
+        return self._call_many("inflect", self.backend.inflect_many, items)
+
+    def case_number_pairs_many(self, words):
+        return self._call_many("parse", self.backend.case_number_pairs_many, words)
+
+    def normal_form_many(self, words):
+        return self._call_many("normal_form", self.backend.normal_form_many, words)
+
+    def lexeme_many(self, items):
+        return self._call_many("lexeme", self.backend.lexeme_many, items)
+
+
+def cache_collector(morph) -> Callable[[], List[str]]:
+    """Expose CachedMorphology counters in Prometheus format."""
+    def collect():
+        stats = morph.stats()
+        lines = []
+        for field, kind in (("hits", "counter"), ("misses", "counter"),
+                            ("evictions", "counter"), ("size", "gauge")):
+            name = f"drill_morph_cache_{field}" + ("_total" if kind == "counter" else "")
+            lines.append(f"# TYPE {name} {kind}")
+            for operation, values in sorted(stats.items()):
+                lines.append(f'{name}{{operation="{operation}"}} {values[field]}')
+        return lines
+    return collect
+
+
+def request_action() -> str:
+    """Label for the drill action of the current request, from a fixed set."""
+    if request.method != "POST":
+        return "view"
+    action = request.form.get("action")
+    return action if action in ("submit", "next") else "other"
+
+
+def init_metrics(app, metrics: Metrics):
+    """
+    Install request timing hooks, the optional sampled profiler and /metrics.
+
+    Args:
+        app: The Flask application instance
+        metrics: The Metrics instance to record into
+    """
+    # Server-side sessions time their own (lazy) loads
+    if type(app.session_interface) is SecureCookieSessionInterface:
+        app.session_interface = TimedSessionInterface()
+    sample_rate = app.config['PROFILE_SAMPLE_RATE']
+    profile_dir = app.config['PROFILE_DIR']
+    if sample_rate:
+        if not profile_dir:
+            raise ValueError("PROFILE_SAMPLE_RATE needs PROFILE_DIR")
+        private_directory(profile_dir)
+
+    inner_wsgi_app = app.wsgi_app
+
+    def timed_wsgi_app(environ, start_response):
+        # Stamp the start before the session is opened
+        environ['drill.request_start'] = time.perf_counter()
+        return inner_wsgi_app(environ, start_response)
+
+    app.wsgi_app = timed_wsgi_app
+
+    @app.before_request
+    def start_profiler():
+        if sample_rate and random.random() < sample_rate:
+            g.drill_profiler = cProfile.Profile()
+            g.drill_profiler.enable()
+
+    def start_render(sender, template, context, **extra):
+        if has_request_context():
+            g.drill_render_start = time.perf_counter()
+
+    def finish_render(sender, template, context, **extra):
+        if has_request_context() and 'drill_render_start' in g:
+            phases = g.setdefault("drill_phases", {})
+            phases["render"] = phases.get("render", 0.0) + time.perf_counter() - g.pop('drill_render_start')
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(finish_render, app, weak=False)
+
+    @app.after_request
+    def record_request(response):
+        if request.environ.get('drill.prewarm'):
+            # Synthetic startup requests (startup.prewarm) are not traffic
+            return response
+        route = request.endpoint or "unknown"
+        action = request_action()
+        metrics.requests.inc(route=route, action=action, status=str(response.status_code))
+        start = request.environ.get('drill.request_start')
+        if start is not None:
+            metrics.request_seconds.observe(time.perf_counter() - start, route=route, action=action)
+        for name, seconds in g.get("drill_phases", {}).items():
+            metrics.phase_seconds.observe(seconds, route=route, action=action, phase=name)
+        return response
+
+    @app.teardown_request
+    def stop_profiler(exc):
+        # Teardown runs even when the view raised and after_request was skipped,
+        # so a profiler is never left enabled on the worker thread
+        profiler = g.pop('drill_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(
+                profile_dir, f"{request.endpoint or 'unknown'}-{time.time():.6f}-{os.getpid()}.prof"))
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """Expose the metrics in the Prometheus text format."""
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
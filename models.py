@@ -2,16 +2,167 @@
 Data models and structures for the Russian Noun Cases Drill application.
 """
 
-import json
 import os
 import random
-from typing import Dict, List, Tuple, Optional, Any
+import threading
+import time
+from contextlib import nullcontext
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple, Optional, Any
+
+from corpus import Corpus, load_words
+from lexicon import PARTS_OF_SPEECH
+from paradigms import DeclensionIndex, SentenceIndex
+from sampling import AliasTable, zipf_weights
+from startup import timed
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Used when the nouns file is missing or has no valid entries
+FALLBACK_NOUNS = (
+    "слово", "человек", "время", "дело", "жизнь",
+    "день", "рука", "работа", "место", "право"
+)
+
+# Russian display names, built once and shared read-only by every request
+RU_CASE_OPTIONS = MappingProxyType({
+    "nomn": "Именительный",
+    "gent": "Родительный",
+    "datv": "Дательный",
+    "accs": "Винительный",
+    "ablt": "Творительный",
+    "loct": "Предложный"
+})
+
+RU_NUMBER_OPTIONS = MappingProxyType({
+    "sing": "Единственное число",
+    "plur": "Множественное число"
+})
+
+class CorpusSnapshot:
+    """
+    Class to hold one loaded corpus and the tables derived from it.
+
+    A snapshot is never modified after it is built. Reloading builds a new
+    one and swaps it in with a single assignment, so a request that reads
+    DrillData.snapshot once sees the nouns, sentences, sampling tables,
+    paradigms and insert question index of the same corpus throughout.
+    """
+
+    def __init__(self, top_nouns, insert_sentences, generation: str, noun_sampling: str = "uniform",
+                 sentence_sampling: str = "balanced", pack=None, declensions=None, sentences=None):
+        """
+        Args:
+            top_nouns: Nouns in frequency order
+            insert_sentences: Case bucket -> sentences
+            generation: Digest of the corpus; question tokens carry it so
+                answers to positions in another corpus are rejected
+            noun_sampling: As in DrillData
+            sentence_sampling: As in DrillData
+            pack: The DrillPack the corpus comes from, if any
+            declensions: Optional DeclensionIndex over top_nouns
+            sentences: Optional SentenceIndex over insert_sentences
+        """
+        self.top_nouns = top_nouns
+        self.insert_sentences = insert_sentences
+        self.generation = generation
+        self.pack = pack
+        self.declensions = declensions
+        self.sentences = sentences
+
+        self._noun_sampler = None
+        if noun_sampling == "frequency" and top_nouns:
+            self._noun_sampler = AliasTable(zipf_weights(len(top_nouns)))
+
+        # Cases that have at least one sentence; question tokens refer to
+        # sentences by their index in this list
+        self.sentence_cases = [case for case, sentences in insert_sentences.items() if sentences]
+        self._case_sampler = None
+        if sentence_sampling == "proportional" and self.sentence_cases:
+            self._case_sampler = AliasTable([len(insert_sentences[case]) for case in self.sentence_cases])
+
+        # Packs have their own noun lookup
+        self._noun_positions = None
+        if pack is None:
+            self._noun_positions = {noun: position for position, noun in enumerate(top_nouns)}
+
+    def get_random_noun_position(self) -> int:
+        """Get the position of a random noun in the list."""
+        if self._noun_sampler is not None:
+            return self._noun_sampler.sample()
+        return random.randrange(len(self.top_nouns))
+
+    def noun_position(self, noun: str) -> int:
+        """Return the position of a noun in the list, or -1 if it is not there."""
+        if self.pack is not None:
+            return self.pack.noun_position(noun)
+        return self._noun_positions.get(noun, -1)
+
+    def get_random_noun(self) -> str:
+        """Get a random noun from the list."""
+        return self.top_nouns[self.get_random_noun_position()]
+
+    def get_random_sentence_position(self) -> Tuple[int, int]:
+        """Get (case index, sentence index) of a random insert drill sentence."""
+        if not self.sentence_cases:
+            return -1, -1
+
+        # Choose a random case
+        if self._case_sampler is not None:
+            case_index = self._case_sampler.sample()
+        else:
+            case_index = random.randrange(len(self.sentence_cases))
+        # Choose a random sentence from that case
+        position = random.randrange(len(self.insert_sentences[self.sentence_cases[case_index]]))
+
+        return case_index, position
+
+    def get_sentence(self, case_index: int, position: int) -> Tuple[str, Dict[str, Any]]:
+        """Get a sentence by its case index and position within the case."""
+        chosen_case = self.sentence_cases[case_index]
+        return chosen_case, self.insert_sentences[chosen_case][position]
+
+    def has_sentence(self, case_index: int, position: int) -> bool:
+        """Check that a (case index, position) pair refers to a sentence."""
+        return (0 <= case_index < len(self.sentence_cases)
+                and 0 <= position < len(self.insert_sentences[self.sentence_cases[case_index]]))
+
+    def get_random_sentence(self) -> Tuple[str, Dict[str, Any]]:
+        """Get a random sentence for the insert drill."""
+        case_index, position = self.get_random_sentence_position()
+        if case_index < 0:
+            return "", {}
+        return self.get_sentence(case_index, position)
+
 
 class DrillData:
     """Class to manage drill data and operations."""
 
-    def __init__(self):
-        """Initialize the drill data."""
+    def __init__(self, pack_path: Optional[str] = None, noun_sampling: str = "uniform",
+                 sentence_sampling: str = "balanced", nouns_file: Optional[str] = None,
+                 sentences_file: Optional[str] = None, words_file: Optional[str] = None, morph=None):
+        """
+        Initialize the drill data.
+
+        Args:
+            pack_path: Optional path to a binary drill pack built with pack.py.
+                When given, nouns and sentences are read from the memory-mapped
+                pack instead of the JSON files.
+            noun_sampling: 'uniform', or 'frequency' to favour nouns near the
+                top of the frequency-ordered noun list
+            sentence_sampling: 'balanced' to pick every case equally often, or
+                'proportional' to weight cases by their number of sentences
+            nouns_file: Nouns .jsonl or .json file (default data/nouns.json)
+            sentences_file: Sentences .jsonl or .json file (default data/sentences.json)
+            words_file: Word lists of the other parts of speech, .jsonl or
+                .json (default data/words.json); read once, also with a pack
+            morph: Optional Morphology; when given, every snapshot carries
+                the DeclensionIndex of its nouns and the SentenceIndex of
+                its sentences
+        """
+        self.noun_sampling = noun_sampling
+        self.sentence_sampling = sentence_sampling
+        self.morph = morph
         self.case_options = {
             "nomn": "Nominative",
             "gent": "Genitive",
@@ -26,73 +177,122 @@ class DrillData:
             "plur": "Plural"
         }
 
-        # Load data from JSON files
-        self.top_nouns = self._load_nouns()
-        self.insert_sentences = self._load_sentences()
+        self.pack = None
+        self.corpus = None
+        # Signature of corpus files that failed to reload, so they are not retried
+        self._failed_signature = None
+        # pid of the process whose watcher thread is running
+        self._watcher_pid = None
+        self._reload_lock = threading.Lock()
+        if pack_path:
+            from pack import DrillPack
+            self.pack = DrillPack(pack_path)
+            self.snapshot = self._snapshot(self.pack.top_nouns, self.pack.insert_sentences, self.pack.digest,
+                                           startup=True)
+        else:
+            self.corpus = Corpus(
+                nouns_file or os.path.join(DATA_DIR, 'nouns.json'),
+                sentences_file or os.path.join(DATA_DIR, 'sentences.json'),
+            ).load()
+            self.snapshot = self._snapshot_corpus(self.corpus, startup=True)
+        # Part of speech -> words, for ParadigmStore
+        self.words = load_words(words_file or os.path.join(DATA_DIR, 'words.json'), PARTS_OF_SPEECH)
 
-    def _load_nouns(self) -> List[str]:
-        """Load nouns from the JSON file."""
-        try:
-            app_folder = os.path.dirname(os.path.abspath(__file__))
-            nouns_file = os.path.join(app_folder, 'data', 'nouns.json')
-            with open(nouns_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('top_nouns', [])
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"Error loading nouns: {e}")
-            # Fallback to hardcoded list if file can't be loaded
-            return [
-                "слово", "человек", "время", "дело", "жизнь",
-                "день", "рука", "работа", "место", "право"
-            ]
-
-    def _load_sentences(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Load insert drill sentences from the JSON file."""
+    def _snapshot(self, top_nouns, insert_sentences, generation: str, startup: bool = False) -> CorpusSnapshot:
+        """Build a snapshot; the first one's indexes are timed as startup phases."""
+        declensions = sentences = None
+        if self.morph is not None:
+            phase = timed if startup else (lambda name: nullcontext())
+            with phase("declensions"):
+                # Decline every noun once so requests only do dict lookups
+                declensions = DeclensionIndex(self.morph, top_nouns, pack=self.pack)
+            with phase("sentences"):
+                # Split every insert sentence once and check it against its case bucket
+                sentences = SentenceIndex(self.morph, insert_sentences, pack=self.pack)
+        return CorpusSnapshot(top_nouns, insert_sentences, generation, self.noun_sampling,
+                              self.sentence_sampling, pack=self.pack, declensions=declensions,
+                              sentences=sentences)
+
+    def _snapshot_corpus(self, corpus: Corpus, startup: bool = False) -> CorpusSnapshot:
+        return self._snapshot(corpus.nouns or list(FALLBACK_NOUNS), corpus.insert_sentences, corpus.digest,
+                              startup)
+
+    @property
+    def top_nouns(self):
+        """Nouns of the current snapshot."""
+        return self.snapshot.top_nouns
+
+    @property
+    def insert_sentences(self):
+        """Insert drill sentences of the current snapshot."""
+        return self.snapshot.insert_sentences
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the corpus files if they changed on disk since the last load.
+
+        The new snapshot is built on the side and swapped in with one
+        assignment, so requests keep using the old one until it is ready.
+        Files that fail to load (missing, half-written or without valid
+        entries) leave the current snapshot in place and are not retried
+        until they change again. Packs are never reloaded.
+
+        Returns:
+            True if a new corpus was loaded
+        """
+        if self.corpus is None or not self.corpus.changed():
+            return False
+        # Another thread is already reloading
+        if not self._reload_lock.acquire(blocking=False):
+            return False
         try:
-            app_folder = os.path.dirname(os.path.abspath(__file__))
-            sentences_file = os.path.join(app_folder, 'data', 'sentences.json')
-            with open(sentences_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('insert_sentences', {})
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"Error loading sentences: {e}")
-            # Return empty dict if file can't be loaded
-            return {}
-
-    def get_case_options(self, lang: str) -> Dict[str, str]:
+            corpus = Corpus(self.corpus.nouns_path, self.corpus.sentences_path)
+            signature = corpus.signature()
+            if signature == self._failed_signature:
+                return False
+            try:
+                corpus.load(strict=True)
+                snapshot = self._snapshot_corpus(corpus)
+            except (OSError, ValueError) as e:
+                self._failed_signature = signature
+                print(f"Corpus reload failed, keeping the current corpus: {e}")
+                return False
+            self.corpus = corpus
+            self.snapshot = snapshot
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def watch(self, interval: float) -> None:
+        """
+        Reload changed corpus files every `interval` seconds on a background thread.
+
+        Safe to call on every request: the thread is started once per
+        process, so a gunicorn worker forked from a preloading master starts
+        its own, and requests never wait for a reload.
+        """
+        pid = os.getpid()
+        if self.corpus is None or self._watcher_pid == pid:
+            return
+        with self._reload_lock:
+            if self._watcher_pid == pid:
+                return
+            self._watcher_pid = pid
+        threading.Thread(target=self._watch, args=(interval,), name="corpus-reload", daemon=True).start()
+
+    def _watch(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            self.reload_if_changed()
+
+    def get_case_options(self, lang: str) -> Mapping[str, str]:
         """Get case options based on language."""
         if lang == 'ru':
-            return {
-                "nomn": "Именительный",
-                "gent": "Родительный",
-                "datv": "Дательный",
-                "accs": "Винительный",
-                "ablt": "Творительный",
-                "loct": "Предложный"
-            }
+            return RU_CASE_OPTIONS
         return self.case_options
 
-    def get_number_options(self, lang: str) -> Dict[str, str]:
+    def get_number_options(self, lang: str) -> Mapping[str, str]:
         """Get number options based on language."""
         if lang == 'ru':
-            return {
-                "sing": "Единственное число",
-                "plur": "Множественное число"
-            }
+            return RU_NUMBER_OPTIONS
         return self.number_options
-
-    def get_random_noun(self) -> str:
-        """Get a random noun from the list."""
-        return random.choice(self.top_nouns)
-
-    def get_random_sentence(self) -> Tuple[str, Dict[str, Any]]:
-        """Get a random sentence for the insert drill."""
-        if not self.insert_sentences:
-            return "", {}
-
-        # Choose a random case
-        chosen_case = random.choice(list(self.insert_sentences.keys()))
-        # Choose a random sentence from that case
-        sentence_data = random.choice(self.insert_sentences[chosen_case])
-
-        return chosen_case, sentence_data
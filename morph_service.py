@@ -0,0 +1,199 @@
+"""
+Process-pool morphology service for the Russian Noun Cases Drill application.
+
+pymorphy3 is pure Python, so analyzer work in threaded web workers is
+serialized by the GIL. This service runs a pool of processes, each holding
+one MorphAnalyzer, behind a Unix socket. Web workers connect with
+MorphClient, which implements the same interface as morphology.Morphology,
+and send batched requests; the server spreads each batch across the pool.
+Analyzer memory is then paid once per core instead of once per web worker.
+
+Start the service with:
+
+    python morph_service.py --socket /tmp/noun-drill-morph.sock --workers 4
+
+and point the app at it with MORPH_SERVICE=/tmp/noun-drill-morph.sock.
+"""
+
+import argparse
+import multiprocessing
+import os
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+from morphology import Lexeme
+
+OPERATIONS = ("inflect", "case_number_pairs", "normal_form", "lexeme")
+
+# Smallest slice of a batch worth shipping to a separate process
+MIN_CHUNK = 16
+
+_worker_morph = None
+
+
+def _init_worker():
+    """Load one analyzer per pool process."""
+    global _worker_morph
+    import pymorphy3
+
+    from morphology import Morphology
+
+    _worker_morph = Morphology(pymorphy3.MorphAnalyzer())
+
+
+def _run_chunk(task):
+    """Run one operation over a chunk of argument tuples in a pool process."""
+    operation, items = task
+    fn = getattr(_worker_morph, operation)
+    return [fn(*args) for args in items]
+
+
+class MorphServer:
+    """Class serving batched analyzer requests from a process pool."""
+
+    def __init__(self, address: str, workers: int, authkey: Optional[bytes] = None):
+        """
+        Args:
+            address: Path of the Unix socket to listen on
+            workers: Number of analyzer processes
+            authkey: Optional shared secret clients must present
+        """
+        self.address = address
+        self.workers = workers
+        self.authkey = authkey
+        self.pool = multiprocessing.Pool(workers, initializer=_init_worker)
+
+    def serve_forever(self):
+        """Accept connections and answer them, one thread per connection."""
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        # Requests are unpickled, so only the service's own user may connect;
+        # the socket is created owner-only rather than chmod-ed after bind
+        umask = os.umask(0o177)
+        try:
+            listener = Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+        finally:
+            os.umask(umask)
+        with listener:
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    operation, items = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self.run(operation, items)))
+                except Exception as e:  # report the failure to the client, keep serving
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+
+    def run(self, operation: str, items: Sequence[Tuple]) -> List:
+        """Run an operation over a batch, spreading large batches across the pool."""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        if len(items) < 2 * MIN_CHUNK:
+            return self.pool.apply(_run_chunk, ((operation, list(items)),))
+
+        size = max(MIN_CHUNK, -(-len(items) // self.workers))
+        chunks = [(operation, list(items[i:i + size])) for i in range(0, len(items), size)]
+        results = []
+        for part in self.pool.map(_run_chunk, chunks):
+            results.extend(part)
+        return results
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+class MorphClient:
+    """Client for MorphServer with the same interface as morphology.Morphology."""
+
+    def __init__(self, address: str, authkey: Optional[bytes] = None):
+        """
+        Args:
+            address: Path of the service's Unix socket
+            authkey: Shared secret, if the server requires one
+        """
+        self.address = address
+        self.authkey = authkey
+        # One connection per thread; a connection carries one request at a time
+        self._local = threading.local()
+
+    def _connection(self):
+        # A connection opened before a fork (gunicorn's preload_app) would be
+        # shared by every worker and interleave their replies, so each
+        # process opens its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            self._local.pid = os.getpid()
+        return conn
+
+    def _request(self, operation: str, items: List[Tuple]) -> List:
+        conn = self._connection()
+        try:
+            conn.send((operation, items))
+            status, payload = conn.recv()
+        except (EOFError, OSError):
+            # Drop the broken connection so the next call reconnects
+            self._local.conn = None
+            raise
+        if status != "ok":
+            raise RuntimeError(f"Morphology service error: {payload}")
+        return payload
+
+    def inflect_many(self, items: Sequence[Tuple[str, str, str]]) -> List[Optional[str]]:
+        """Batched Morphology.inflect over (word, case, number) tuples."""
+        return self._request("inflect", list(items))
+
+    def case_number_pairs_many(self, words: Sequence[str]) -> List[FrozenSet[Tuple[str, str]]]:
+        """Batched Morphology.case_number_pairs."""
+        return self._request("case_number_pairs", [(w,) for w in words])
+
+    def normal_form_many(self, words: Sequence[str]) -> List[str]:
+        """Batched Morphology.normal_form."""
+        return self._request("normal_form", [(w,) for w in words])
+
+    def lexeme_many(self, items: Sequence[Tuple[str, str]]) -> List[Lexeme]:
+        """Batched Morphology.lexeme over (word, pos) tuples."""
+        return self._request("lexeme", list(items))
+
+    def inflect(self, word: str, case: str, number: str) -> Optional[str]:
+        return self.inflect_many([(word, case, number)])[0]
+
+    def case_number_pairs(self, word: str) -> FrozenSet[Tuple[str, str]]:
+        return self.case_number_pairs_many([word])[0]
+
+    def normal_form(self, word: str) -> str:
+        return self.normal_form_many([word])[0]
+
+    def lexeme(self, word: str, pos: str) -> Lexeme:
+        return self.lexeme_many([(word, pos)])[0]
+
+
+def main(argv=None):
+    """Run the morphology service."""
+    parser = argparse.ArgumentParser(description="Serve pymorphy3 analysis from a process pool.")
+    parser.add_argument("--socket", default="/tmp/noun-drill-morph.sock", help="Unix socket path")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Analyzer processes")
+    args = parser.parse_args(argv)
+
+    authkey = os.environ.get("MORPH_SERVICE_AUTHKEY")
+    server = MorphServer(args.socket, args.workers, authkey.encode() if authkey else None)
+    print(f"Morphology service on {args.socket} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Shared pymorphy3 analyzer for the Russian Noun Cases Drill application.
+
+Loading the Russian dictionaries is the slowest part of startup and a large
+part of each process's memory. The analyzer is therefore created once per
+process and, under gunicorn with ``preload_app``, once in the master before
+workers are forked so that every worker shares the same pages.
+"""
+
+import gc
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Optional, Sequence, Tuple
+
+from startup import timed
+
+# (form, grammemes) of every form of a lexeme
+Lexeme = Tuple[Tuple[str, FrozenSet[str]], ...]
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer():
+    """Return the process-wide MorphAnalyzer, loading it on first use."""
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                # Imported here so processes that never analyze skip the import
+                with timed("morph_analyzer"):
+                    import pymorphy3
+                    _analyzer = pymorphy3.MorphAnalyzer()
+    return _analyzer
+
+
+def freeze_shared_state():
+    """
+    Move everything loaded so far out of the garbage collector's reach.
+
+    Called in the gunicorn master right before forking. Frozen objects are
+    never traversed by the collector, so workers do not write to (and thereby
+    copy) the pages holding the analyzer dictionaries and drill data.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+class Morphology:
+    """Class exposing the analyzer operations the drills use."""
+
+    def __init__(self, analyzer=None):
+        """
+        Args:
+            analyzer: The pymorphy3 MorphAnalyzer instance; None to use the
+                process-wide analyzer, loaded on first use
+        """
+        self._analyzer = analyzer
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            self._analyzer = get_analyzer()
+        return self._analyzer
+
+    def inflect(self, word: str, case: str, number: str) -> Optional[str]:
+        """Inflect the most likely parse of a word; None if impossible."""
+        inflected_obj = self.analyzer.parse(word)[0].inflect({case, number})
+        return inflected_obj.word if inflected_obj else None
+
+    def case_number_pairs(self, word: str) -> FrozenSet[Tuple[str, str]]:
+        """Collect the (case, number) pairs of every parse of a word."""
+        # Grammemes are str subclasses that cannot be pickled; keep plain strings
+        return frozenset(
+            (str(parse.tag.case), str(parse.tag.number))
+            for parse in self.analyzer.parse(word)
+            if parse.tag.case and parse.tag.number
+        )
+
+    def normal_form(self, word: str) -> str:
+        """Return the normal form of the most likely parse of a word."""
+        return self.analyzer.parse(word)[0].normal_form
+
+    # Batched forms of the operations, as MorphClient serves them in one
+    # round trip; in process there is nothing to batch
+
+    def inflect_many(self, items: Sequence[Tuple[str, str, str]]) -> List[Optional[str]]:
+        """Morphology.inflect over (word, case, number) tuples."""
+        return [self.inflect(*item) for item in items]
+
+    def case_number_pairs_many(self, words: Sequence[str]) -> List[FrozenSet[Tuple[str, str]]]:
+        """Morphology.case_number_pairs over words."""
+        return [self.case_number_pairs(word) for word in words]
+
+    def normal_form_many(self, words: Sequence[str]) -> List[str]:
+        """Morphology.normal_form over words."""
+        return [self.normal_form(word) for word in words]
+
+    def lexeme_many(self, items: Sequence[Tuple[str, str]]) -> List[Lexeme]:
+        """Morphology.lexeme over (word, pos) tuples."""
+        return [self.lexeme(*item) for item in items]
+
+    def lexeme(self, word: str, pos: str) -> Lexeme:
+        """
+        Return every form with the given POS tag in the word's lexeme.
+
+        The lexeme is taken from the most likely parse that has such forms,
+        so an infinitive yields its finite verb forms for pos 'VERB'.
+        """
+        for parse in self.analyzer.parse(word):
+            forms = tuple(
+                (form.word, frozenset(str(grammeme) for grammeme in form.tag.grammemes))
+                for form in parse.lexeme
+                if form.tag.POS == pos
+            )
+            if forms:
+                return forms
+        return ()
+
+
+class LRUCache:
+    """Thread-safe, size-bounded least-recently-used cache with counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+
+        # Compute outside the lock so slow analyzer calls don't serialize
+        value = compute()
+        if self.maxsize <= 0:
+            return value
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def get_or_compute_many(self, keys: Sequence[Hashable],
+                            compute_many: Callable[[List[Hashable]], List[Any]]) -> List[Any]:
+        """Return the cached value of every key, computing all misses in one call."""
+        values = {}
+        with self._lock:
+            for key in keys:
+                if key in values:
+                    continue
+                try:
+                    values[key] = self._data[key]
+                except KeyError:
+                    self.misses += 1
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+        missing = [key for key in dict.fromkeys(keys) if key not in values]
+        if missing:
+            computed = compute_many(missing)
+            values.update(zip(missing, computed))
+            if self.maxsize > 0:
+                with self._lock:
+                    for key, value in zip(missing, computed):
+                        self._data[key] = value
+                        self._data.move_to_end(key)
+                    while len(self._data) > self.maxsize:
+                        self._data.popitem(last=False)
+                        self.evictions += 1
+        return [values[key] for key in keys]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the size and hit/miss/eviction counters."""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class CachedMorphology:
+    """Class wrapping a Morphology backend with per-operation LRU caches."""
+
+    def __init__(self, backend, maxsize: int):
+        """
+        Args:
+            backend: A Morphology (or compatible) instance
+            maxsize: Maximum number of entries kept per operation
+        """
+        self.backend = backend
+        self.caches = {
+            "parse": LRUCache(maxsize),
+            "inflect": LRUCache(maxsize),
+            "normal_form": LRUCache(maxsize),
+        }
+
+    def inflect(self, word: str, case: str, number: str) -> Optional[str]:
+        """Cached Morphology.inflect."""
+        return self.caches["inflect"].get_or_compute(
+            (word, case, number), lambda: self.backend.inflect(word, case, number)
+        )
+
+    def case_number_pairs(self, word: str) -> FrozenSet[Tuple[str, str]]:
+        """Cached Morphology.case_number_pairs."""
+        return self.caches["parse"].get_or_compute(
+            word, lambda: self.backend.case_number_pairs(word)
+        )
+
+    def normal_form(self, word: str) -> str:
+        """Cached Morphology.normal_form."""
+        return self.caches["normal_form"].get_or_compute(
+            word, lambda: self.backend.normal_form(word)
+        )
+
+    def inflect_many(self, items: Sequence[Tuple[str, str, str]]) -> List[Optional[str]]:
+        """Cached Morphology.inflect_many; only the misses reach the backend, in one batch."""
+        return self.caches["inflect"].get_or_compute_many([tuple(item) for item in items],
+                                                          self.backend.inflect_many)
+
+    def case_number_pairs_many(self, words: Sequence[str]) -> List[FrozenSet[Tuple[str, str]]]:
+        """Cached Morphology.case_number_pairs_many."""
+        return self.caches["parse"].get_or_compute_many(list(words), self.backend.case_number_pairs_many)
+
+    def normal_form_many(self, words: Sequence[str]) -> List[str]:
+        """Cached Morphology.normal_form_many."""
+        return self.caches["normal_form"].get_or_compute_many(list(words), self.backend.normal_form_many)
+
+    def lexeme(self, word: str, pos: str) -> Lexeme:
+        """Morphology.lexeme, not cached: callers keep the forms they need."""
+        return self.backend.lexeme(word, pos)
+
+    def lexeme_many(self, items: Sequence[Tuple[str, str]]) -> List[Lexeme]:
+        """Morphology.lexeme_many, not cached either."""
+        return self.backend.lexeme_many(items)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the counters of every operation cache."""
+        return {operation: cache.stats() for operation, cache in self.caches.items()}
@@ -0,0 +1,322 @@
+"""
+Binary drill pack for the Russian Noun Cases Drill application.
+
+The pack compiles the noun and sentence corpus, the declension paradigms
+and the precomputed insert drill blanks into a single file that worker
+processes open with mmap. All lookups read straight from the mapping, so
+the data is shared through the page cache instead of being copied into
+Python structures in every worker.
+
+Build a pack with:
+
+    python pack.py data/drill.pack
+"""
+
+import argparse
+import hashlib
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Dict, FrozenSet, List, Optional
+
+from paradigms import CASES, NUMBERS, CaseNumber, SentenceIndex
+
+MAGIC = b"RNDP"
+VERSION = 3
+NO_STRING = 0xFFFFFFFF
+
+# Sections in file order; each is an (offset, length) pair in the directory
+SECTIONS = (
+    "str_offsets",   # u32 * (string_count + 1), offsets into str_data
+    "str_data",      # UTF-8 bytes of every string
+    "nouns",         # u32 string id per noun, in corpus order
+    "noun_order",    # u32 noun position per noun, sorted by noun bytes
+    "paradigms",     # u32 string id per noun * len(CASES) * len(NUMBERS)
+    "pairs",         # u32 (case string id, number string id) per known pair
+    "forms",         # u32 string id per inflected form, sorted by form bytes
+    "form_pairs",    # u32 bitmask over "pairs" per inflected form
+    "buckets",       # u32 (name string id, first sentence, count) per bucket
+    "sentences",     # u32 * SENTENCE_FIELDS per sentence
+)
+# lemma_forms is one string of the hinted word's normalized forms, one per line
+SENTENCE_FIELDS = ("sentence", "word_index", "blank_sentence", "answer", "normal_form", "lemma_forms")
+
+# Magic, version, byte order, and a digest of everything after the header
+_HEADER = struct.Struct("<4sHH8s")
+_DIRECTORY = struct.Struct("<" + "II" * len(SECTIONS))
+_BYTE_ORDER = {"little": 0, "big": 1}
+
+
+class _StringTable:
+    """Helper to intern strings while building a pack."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, value: str) -> int:
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return sid
+
+
+def build_pack(path: str, drill_data, declensions) -> None:
+    """
+    Compile the drill corpus into a binary pack.
+
+    Args:
+        path: Output file path
+        drill_data: DrillData instance loaded from the JSON files
+        declensions: DeclensionIndex covering drill_data.top_nouns
+    """
+    strings = _StringTable()
+
+    nouns = array("I", (strings.add(noun) for noun in drill_data.top_nouns))
+
+    paradigms = array("I")
+    for noun in drill_data.top_nouns:
+        for case in CASES:
+            for number in NUMBERS:
+                form = declensions.inflect(noun, case, number)
+                paradigms.append(strings.add(form) if form else NO_STRING)
+
+    all_pairs = sorted({pair for pairs in declensions.form_pairs.values() for pair in pairs})
+    if len(all_pairs) > 32:
+        raise ValueError(f"Too many (case, number) pairs for a pack: {len(all_pairs)}")
+    pair_bits = {pair: 1 << i for i, pair in enumerate(all_pairs)}
+    pairs = array("I")
+    for case, number in all_pairs:
+        pairs.extend((strings.add(case), strings.add(number)))
+
+    form_list = sorted(declensions.form_pairs, key=lambda form: form.encode("utf-8"))
+    forms = array("I", (strings.add(form) for form in form_list))
+    form_pairs = array("I")
+    for form in form_list:
+        mask = 0
+        for pair in declensions.form_pairs[form]:
+            mask |= pair_bits[pair]
+        form_pairs.append(mask)
+
+    buckets = array("I")
+    sentences = array("I")
+    # Preprocessing also reports sentences that do not match their case
+    index = SentenceIndex(declensions.morph, drill_data.insert_sentences)
+    for bucket, entries in drill_data.insert_sentences.items():
+        buckets.extend((strings.add(bucket), len(sentences) // len(SENTENCE_FIELDS), len(entries)))
+        for entry, question in zip(entries, index.questions[bucket]):
+            sentences.extend((
+                strings.add(entry["sentence"]),
+                entry["word_index"],
+                strings.add(question.blank_sentence),
+                strings.add(question.answer),
+                strings.add(question.normal_form),
+                strings.add("\n".join(sorted(question.lemma_forms))),
+            ))
+
+    noun_order = array("I", sorted(
+        range(len(drill_data.top_nouns)),
+        key=lambda i: drill_data.top_nouns[i].encode("utf-8"),
+    ))
+
+    encoded = [s.encode("utf-8") for s in strings.strings]
+    str_offsets = array("I", [0])
+    for data in encoded:
+        str_offsets.append(str_offsets[-1] + len(data))
+    str_data = b"".join(encoded)
+    # Keep every u32 section 4-byte aligned
+    str_data += b"\0" * (-len(str_data) % 4)
+
+    payloads = {
+        "str_offsets": str_offsets.tobytes(),
+        "str_data": str_data,
+        "nouns": nouns.tobytes(),
+        "noun_order": noun_order.tobytes(),
+        "paradigms": paradigms.tobytes(),
+        "pairs": pairs.tobytes(),
+        "forms": forms.tobytes(),
+        "form_pairs": form_pairs.tobytes(),
+        "buckets": buckets.tobytes(),
+        "sentences": sentences.tobytes(),
+    }
+
+    directory = []
+    offset = _HEADER.size + _DIRECTORY.size
+    for name in SECTIONS:
+        directory.extend((offset, len(payloads[name])))
+        offset += len(payloads[name])
+
+    # Hashed once here, so opening a pack never has to read every page
+    body = [_DIRECTORY.pack(*directory)] + [payloads[name] for name in SECTIONS]
+    digest = hashlib.blake2b(digest_size=8)
+    for chunk in body:
+        digest.update(chunk)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, _BYTE_ORDER[sys.byteorder], digest.digest()))
+        for chunk in body:
+            f.write(chunk)
+
+
+class _PackedNouns(Sequence):
+    """Read-only sequence view of the nouns stored in a pack."""
+
+    def __init__(self, pack: "DrillPack"):
+        self._pack = pack
+
+    def __len__(self) -> int:
+        return len(self._pack._nouns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._pack.string(self._pack._nouns[index])
+
+
+class _PackedSentences(Sequence):
+    """Read-only sequence view of one insert drill sentence bucket."""
+
+    def __init__(self, pack: "DrillPack", first: int, count: int):
+        self._pack = pack
+        self._first = first
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("sentence index out of range")
+        base = (self._first + index) * len(SENTENCE_FIELDS)
+        row = self._pack._sentences[base:base + len(SENTENCE_FIELDS)]
+        string = self._pack.string
+        lemma_forms = string(row[5])
+        return {
+            "sentence": string(row[0]),
+            "word_index": row[1],
+            "blank_sentence": string(row[2]),
+            "answer": string(row[3]),
+            "normal_form": string(row[4]),
+            "lemma_forms": lemma_forms.split("\n") if lemma_forms else [],
+        }
+
+
+class DrillPack:
+    """Class to read a binary drill pack through mmap."""
+
+    def __init__(self, path: str):
+        """Map the pack file and validate its header."""
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, byte_order, digest = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} drill pack")
+        if byte_order != _BYTE_ORDER[sys.byteorder]:
+            raise ValueError(f"{path} was built on a machine with a different byte order")
+        # Tokens carry this to tell packs apart; written by build_pack
+        self.digest = digest.hex()
+
+        directory = _DIRECTORY.unpack_from(self._mmap, _HEADER.size)
+        view = memoryview(self._mmap)
+        sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = directory[2 * i], directory[2 * i + 1]
+            sections[name] = view[offset:offset + length]
+
+        self._str_data = sections.pop("str_data")
+        self._str_offsets = sections.pop("str_offsets").cast("I")
+        self._nouns = sections["nouns"].cast("I")
+        self._noun_order = sections["noun_order"].cast("I")
+        self._paradigms = sections["paradigms"].cast("I")
+        self._forms = sections["forms"].cast("I")
+        self._form_pairs = sections["form_pairs"].cast("I")
+        self._sentences = sections["sentences"].cast("I")
+
+        # The handful of pair and bucket descriptors is small enough to decode once
+        raw_pairs = sections["pairs"].cast("I")
+        self._pairs: List[CaseNumber] = [
+            (self.string(raw_pairs[i]), self.string(raw_pairs[i + 1]))
+            for i in range(0, len(raw_pairs), 2)
+        ]
+        raw_buckets = sections["buckets"].cast("I")
+        self.insert_sentences: Dict[str, _PackedSentences] = {
+            self.string(raw_buckets[i]): _PackedSentences(self, raw_buckets[i + 1], raw_buckets[i + 2])
+            for i in range(0, len(raw_buckets), 3)
+        }
+        self.top_nouns = _PackedNouns(self)
+
+    def _bytes(self, sid: int) -> bytes:
+        return self._str_data[self._str_offsets[sid]:self._str_offsets[sid + 1]].tobytes()
+
+    def string(self, sid: int) -> str:
+        """Decode a string by its id."""
+        return self._bytes(sid).decode("utf-8")
+
+    def _search(self, table: memoryview, key: str, to_sid=None) -> int:
+        """Binary search a table sorted by string bytes; return the position or -1."""
+        target = key.encode("utf-8")
+        lo, hi = 0, len(table)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            sid = to_sid(table[mid]) if to_sid else table[mid]
+            if self._bytes(sid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(table):
+            sid = to_sid(table[lo]) if to_sid else table[lo]
+            if self._bytes(sid) == target:
+                return lo
+        return -1
+
+    def noun_position(self, noun: str) -> int:
+        """Return the corpus position of a noun, or -1 if it is not packed."""
+        pos = self._search(self._noun_order, noun, to_sid=lambda i: self._nouns[i])
+        return self._noun_order[pos] if pos >= 0 else -1
+
+    def inflect(self, noun: str, case: str, number: str) -> Optional[str]:
+        """Return the packed form of a noun for the given case and number."""
+        position = self.noun_position(noun)
+        if position < 0 or case not in CASES or number not in NUMBERS:
+            return None
+        slot = (position * len(CASES) + CASES.index(case)) * len(NUMBERS) + NUMBERS.index(number)
+        sid = self._paradigms[slot]
+        return None if sid == NO_STRING else self.string(sid)
+
+    def case_number_pairs(self, form: str) -> Optional[FrozenSet[CaseNumber]]:
+        """Return the (case, number) pairs of a packed form, or None if it is not packed."""
+        pos = self._search(self._forms, form)
+        if pos < 0:
+            return None
+        mask = self._form_pairs[pos]
+        return frozenset(pair for i, pair in enumerate(self._pairs) if mask >> i & 1)
+
+
+def main(argv=None):
+    """Build a drill pack from the JSON corpus."""
+    from models import DrillData
+    from morphology import Morphology, get_analyzer
+    from paradigms import DeclensionIndex
+
+    parser = argparse.ArgumentParser(description="Compile the drill corpus into a binary pack.")
+    parser.add_argument("output", help="Path of the pack file to write")
+    args = parser.parse_args(argv)
+
+    morph = Morphology(get_analyzer())
+    drill_data = DrillData()
+    declensions = DeclensionIndex(morph, drill_data.top_nouns)
+    build_pack(args.output, drill_data, declensions)
+    print(f"Wrote {len(drill_data.top_nouns)} nouns and "
+          f"{sum(len(v) for v in drill_data.insert_sentences.values())} sentences to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Precomputed declension paradigms for the Russian Noun Cases Drill application.
+"""
+
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from answers import normalize_answer
+from utils import build_insert_question, split_sentence
+
+CASES = ("nomn", "gent", "datv", "accs", "ablt", "loct")
+NUMBERS = ("sing", "plur")
+
+# Second genitive/locative/accusative forms (чашка чаю, в шкафу) count as the main case
+CASE_VARIANTS = {"gen2": "gent", "loc2": "loct", "acc2": "accs"}
+
+# Insert drill sentence buckets are named after the case they drill
+BUCKET_CASES = {
+    "именительный": "nomn",
+    "родительный": "gent",
+    "дательный": "datv",
+    "винительный": "accs",
+    "творительный": "ablt",
+    "предложный": "loct",
+}
+
+CaseNumber = Tuple[str, str]
+
+# Every (case, number) slot of a paradigm, in declension order
+CASE_NUMBERS: Tuple[CaseNumber, ...] = tuple((case, number) for case in CASES for number in NUMBERS)
+
+
+class DeclensionIndex:
+    """Class to hold the full case/number paradigm of every drill noun."""
+
+    def __init__(self, morph, nouns: Iterable[str], pack=None):
+        """
+        Build the paradigm of every noun up front.
+
+        Args:
+            morph: The Morphology (or CachedMorphology) instance
+            nouns: The nouns to decline
+            pack: Optional DrillPack that already holds the paradigms; when
+                given, nothing is declined up front and lookups read the pack
+
+        Words that are not drill nouns have no forms here: lookups return
+        None or an empty set instead of declining them on the request path.
+        """
+        self.morph = morph
+        self.pack = pack
+        # noun -> {(case, number): inflected form}
+        self.paradigms: Dict[str, Dict[CaseNumber, str]] = {}
+        # inflected form -> every (case, number) pair the form can express
+        self.form_pairs: Dict[str, FrozenSet[CaseNumber]] = {}
+        # noun -> {(case, number): normalized spellings of every accepted answer}
+        self.answers: Dict[str, Dict[CaseNumber, FrozenSet[str]]] = {}
+        # noun -> normalized spellings of all its forms, filled on first use
+        # for drill nouns only
+        self.forms: Dict[str, FrozenSet[str]] = {}
+
+        if pack is None:
+            self._decline(list(nouns))
+
+    def _decline(self, nouns: List[str]) -> None:
+        """Decline the nouns and add their forms to the index."""
+        # Two batched analyzer calls in all, so a morphology service
+        # (MorphClient) is asked once per operation instead of once per form
+        width = len(CASE_NUMBERS)
+        forms = self.morph.inflect_many([(noun, case, number) for noun in nouns for case, number in CASE_NUMBERS])
+        for i, noun in enumerate(nouns):
+            row = forms[i * width:(i + 1) * width]
+            self.paradigms[noun] = {pair: form for pair, form in zip(CASE_NUMBERS, row) if form}
+
+        new_forms = list(dict.fromkeys(form for form in forms if form and form not in self.form_pairs))
+        self.form_pairs.update(zip(new_forms, self.morph.case_number_pairs_many(new_forms)))
+        for noun in nouns:
+            self.answers[noun] = self._accepted_answers(self.paradigms[noun])
+
+    def _accepted_answers(self, paradigm: Dict[CaseNumber, str]) -> Dict[CaseNumber, FrozenSet[str]]:
+        """
+        Map every (case, number) pair of a paradigm to its accepted answers.
+
+        Besides the paradigm's own form, any other form of the same noun that
+        can also express the pair (годы and года for nomn/plur) is accepted.
+        """
+        expresses = {
+            form: {(CASE_VARIANTS.get(case, case), number) for case, number in self.case_number_pairs(form)}
+            for form in set(paradigm.values())
+        }
+        return {
+            pair: frozenset(normalize_answer(form) for form in expresses if form == target or pair in expresses[form])
+            for pair, target in paradigm.items()
+        }
+
+    def _known(self, noun: str) -> bool:
+        """Check whether a noun was declined here or is in the pack."""
+        return noun in self.paradigms or (self.pack is not None and self.pack.noun_position(noun) >= 0)
+
+    def accepted_answers(self, noun: str, case: str, number: str) -> FrozenSet[str]:
+        """Return the normalized spellings accepted for a noun's case and number."""
+        answers = self.answers.get(noun)
+        if answers is None:
+            if not self._known(noun):
+                return frozenset()
+            # Packed paradigms are declined already; no analyzer calls
+            paradigm = {}
+            for pair in CASE_NUMBERS:
+                form = self.pack.inflect(noun, *pair)
+                if form is not None:
+                    paradigm[pair] = form
+            answers = self.answers[noun] = self._accepted_answers(paradigm)
+        return answers.get((case, number), frozenset())
+
+    def lemma_forms(self, noun: str) -> FrozenSet[str]:
+        """
+        Return the normalized spellings of every form of a noun, for grading.
+
+        Only drill nouns have forms here; any other word gets an empty set,
+        so grading never calls the analyzer or grows the index.
+        """
+        forms = self.forms.get(noun)
+        if forms is None:
+            if not self._known(noun):
+                return frozenset()
+            inflected = (self.inflect(noun, case, number) for case, number in CASE_NUMBERS)
+            forms = self.forms[noun] = frozenset(normalize_answer(form) for form in inflected if form)
+        return forms
+
+    def inflect(self, noun: str, case: str, number: str) -> Optional[str]:
+        """Return the form of a drill noun for the given case and number, or None."""
+        paradigm = self.paradigms.get(noun)
+        if paradigm is not None:
+            return paradigm.get((case, number))
+        if self.pack is not None:
+            # A pack slot without a form has none; the analyzer is not asked again
+            return self.pack.inflect(noun, case, number)
+        return None
+
+    def case_number_pairs(self, form: str) -> FrozenSet[CaseNumber]:
+        """Return all (case, number) pairs an inflected form can express."""
+        if self.pack is not None:
+            pairs = self.pack.case_number_pairs(form)
+            if pairs is not None:
+                return pairs
+        pairs = self.form_pairs.get(form)
+        if pairs is None:
+            # Forms outside the corpus are not stored here, so arbitrary
+            # input cannot grow the index; the analyzer cache is bounded.
+            pairs = self.morph.case_number_pairs(form)
+        return pairs
+
+
+class InsertQuestion:
+    """Preprocessed insert drill question for one sentence."""
+
+    __slots__ = ("blank_sentence", "answer", "accepted", "normal_form", "lemma_forms", "case", "number")
+
+    def __init__(self, blank_sentence: str, answer: str, normal_form: str, case: str, number: str,
+                 lemma_forms: FrozenSet[str] = frozenset()):
+        self.blank_sentence = blank_sentence
+        self.answer = answer
+        # Normalized spelling the learner's answer is compared with
+        self.accepted = frozenset((normalize_answer(answer),))
+        self.normal_form = normal_form
+        # Normalized spellings of every form of the hinted word; answers
+        # among them are wrong, not typos (answers.grade_answer)
+        self.lemma_forms = lemma_forms
+        # Target case and number; number is "" when the form does not decide it
+        self.case = case
+        self.number = number
+
+
+class SentenceIndex:
+    """Class to hold the preprocessed insert drill question of every sentence."""
+
+    def __init__(self, morph, insert_sentences: Mapping[str, Sequence[Any]], pack=None):
+        """
+        Split every sentence once, check its target word against its bucket
+        and decline its hinted word for grading.
+
+        Args:
+            morph: The Morphology (or CachedMorphology) instance
+            insert_sentences: Sentence buckets, as in DrillData.insert_sentences
+            pack: Optional DrillPack holding the sentences; when given, the
+                pack was already checked when it was built and questions are
+                prepared on first use instead of up front
+        """
+        self.morph = morph
+        self.insert_sentences = insert_sentences
+        # bucket -> questions in the order of the bucket's sentences
+        self.questions: Dict[str, List[InsertQuestion]] = {}
+        # (bucket, position) -> question, for packs
+        self._prepared: Dict[Tuple[str, int], InsertQuestion] = {}
+        # Human-readable description of every sentence whose target word
+        # cannot express the case of its bucket
+        self.mismatches: List[str] = []
+
+        if pack is None:
+            self._prepare_all()
+            if self.mismatches:
+                print(f"{len(self.mismatches)} insert sentences do not match their case; "
+                      f"first: {self.mismatches[0]}")
+
+    def _prepare_all(self) -> None:
+        """Prepare every sentence, with one batched analyzer call per operation."""
+        rows = []
+        for bucket, entries in self.insert_sentences.items():
+            self.questions[bucket] = []
+            for position, entry in enumerate(entries):
+                rows.append((bucket, position, entry) + split_sentence(entry["sentence"], entry["word_index"]))
+
+        answers = list(dict.fromkeys(answer for *_, answer in rows if answer))
+        normal_forms = dict(zip(answers, self.morph.normal_form_many(answers)))
+        answer_pairs = dict(zip(answers, self.morph.case_number_pairs_many(answers)))
+        lemmas = list(dict.fromkeys(form for form in normal_forms.values() if form))
+        width = len(CASE_NUMBERS)
+        inflected = self.morph.inflect_many(
+            [(lemma, case, number) for lemma in lemmas for case, number in CASE_NUMBERS]
+        )
+        lemma_forms = {
+            lemma: frozenset(normalize_answer(form) for form in inflected[i * width:(i + 1) * width] if form)
+            for i, lemma in enumerate(lemmas)
+        }
+
+        for bucket, position, entry, blank_sentence, answer in rows:
+            normal_form = normal_forms.get(answer, "")
+            self.questions[bucket].append(self._question(
+                bucket, position, entry["sentence"], blank_sentence, answer, normal_form,
+                answer_pairs.get(answer, frozenset()), lemma_forms.get(normal_form, frozenset()),
+            ))
+
+    def _prepare(self, bucket: str, position: int, sentence_data) -> InsertQuestion:
+        """Prepare one packed sentence; its hinted word was declined when the pack was built."""
+        blank_sentence, answer, normal_form = build_insert_question(self.morph, sentence_data)
+        pairs = self.morph.case_number_pairs(answer) if answer else frozenset()
+        return self._question(bucket, position, sentence_data["sentence"], blank_sentence, answer, normal_form,
+                              pairs, frozenset(sentence_data["lemma_forms"]))
+
+    def _question(self, bucket: str, position: int, sentence: str, blank_sentence: str, answer: str,
+                  normal_form: str, pairs: FrozenSet[CaseNumber], lemma_forms: FrozenSet[str]) -> InsertQuestion:
+        case = BUCKET_CASES.get(bucket.lower(), "")
+        numbers = {number for form_case, number in pairs if CASE_VARIANTS.get(form_case, form_case) == case}
+
+        if not case:
+            self.mismatches.append(f"{bucket}[{position}]: unknown case bucket")
+        elif not numbers:
+            self.mismatches.append(
+                f"{bucket}[{position}]: {answer!r} in {sentence!r} is not {case}"
+            )
+        number = numbers.pop() if len(numbers) == 1 else ""
+        return InsertQuestion(blank_sentence, answer, normal_form, case, number, lemma_forms)
+
+    def get(self, bucket: str, position: int) -> InsertQuestion:
+        """Return the question for a sentence by bucket and position."""
+        questions = self.questions.get(bucket)
+        if questions is not None:
+            return questions[position]
+        question = self._prepared.get((bucket, position))
+        if question is None:
+            question = self._prepared[(bucket, position)] = self._prepare(
+                bucket, position, self.insert_sentences[bucket][position]
+            )
+        return question
@@ -2,23 +2,178 @@
 Route handlers for the Russian Noun Cases Drill application.
 """
 
+import os
 import random
-from flask import render_template, request, session, redirect, url_for
+import secrets
+import threading
+from flask import (abort, jsonify, make_response, render_template, request, send_from_directory,
+                   session, redirect, url_for)
 
+from lexicon import PARTS_OF_SPEECH, ParadigmStore
+from metrics import phase
 from models import DrillData
-from utils import get_translations, generate_question, get_feedback
+from scheduler import ReviewScheduler
+from startup import timed
+from tokens import BACKWARD, FORWARD, INSERT, WORD_FORM, WORD_READING, QuestionSigner
+from answers import CORRECT, grade_answer
+from utils import (get_grammeme_labels, get_translations, generate_form_question, generate_form_questions,
+                   generate_question, generate_questions, get_feedback)
 
-# Initialize drill data
-drill_data = DrillData()
+# Endpoints that use the drill data; with LAZY_INIT the first of them loads it
+DATA_ENDPOINTS = frozenset({
+    'api_questions', 'api_check', 'forward_drill', 'backward_drill', 'insert_drill', 'forms_drill',
+})
+
+# Parts of speech drilled by the word form drills; nouns have their own
+FORM_DRILLS = tuple(pos for pos in PARTS_OF_SPEECH if pos != 'noun')
 
 def init_routes(app, morph):
     """
     Initialize all route handlers for the application.
 
+    The drill data (whose snapshot holds the declension and sentence
+    indexes), the paradigm store and the scheduler are built here, or with
+    LAZY_INIT by the first request to a DATA_ENDPOINTS route.
+
     Args:
         app: The Flask application instance
-        morph: The pymorphy3 MorphAnalyzer instance
+        morph: The CachedMorphology wrapping the pymorphy3 analyzer
     """
+    drill_data = store = scheduler = None
+    load_lock = threading.Lock()
+
+    def load_drill_data():
+        """Build the drill data and everything derived from it."""
+        nonlocal drill_data, store, scheduler
+        with timed("drill_data"):
+            # The corpus snapshot includes its declensions and preprocessed insert sentences
+            data = DrillData(
+                pack_path=app.config['DRILL_PACK'],
+                noun_sampling=app.config['NOUN_SAMPLING'],
+                sentence_sampling=app.config['SENTENCE_SAMPLING'],
+                nouns_file=app.config['NOUNS_FILE'],
+                sentences_file=app.config['SENTENCES_FILE'],
+                words_file=app.config['WORDS_FILE'],
+                morph=morph,
+            )
+        with timed("paradigm_store"):
+            # One lexeme per adjective, pronoun and verb, indexed by slot
+            store = ParadigmStore(morph, data.words)
+        if app.config['REVIEW_DB']:
+            scheduler = ReviewScheduler(
+                app.config['REVIEW_DB'],
+                interval_seconds=app.config['REVIEW_INTERVAL_SECONDS'],
+                relearn_seconds=app.config['REVIEW_RELEARN_SECONDS'],
+            )
+        # Assigned last: requests only check drill_data to see whether the rest is ready
+        drill_data = data
+
+    if app.config['LAZY_INIT']:
+        @app.before_request
+        def ensure_drill_data():
+            """Load the drill data on the first request that needs it."""
+            if drill_data is None and request.endpoint in DATA_ENDPOINTS:
+                with load_lock:
+                    if drill_data is None:
+                        load_drill_data()
+    else:
+        load_drill_data()
+
+    signer = QuestionSigner(app.config['SECRET_KEY'])
+    # lang -> rendered home page; it only depends on the language
+    home_pages = {}
+    # Link the client-side drill from the home page once a bundle is built
+    client_drill = os.path.isfile(os.path.join(app.config['BUNDLE_DIR'], 'manifest.json'))
+
+    reload_interval = app.config['CORPUS_RELOAD_INTERVAL']
+    # Packs are immutable; only corpus files are watched
+    if reload_interval and not app.config['DRILL_PACK']:
+        @app.before_request
+        def watch_corpus():
+            """Start this process's corpus watcher once the drill data is loaded."""
+            # The reload runs on the watcher thread and swaps in a new snapshot;
+            # requests never wait for it and running ones keep theirs
+            if drill_data is not None:
+                drill_data.watch(reload_interval)
+
+    def load_noun_token(data, token):
+        """Return (noun_position, case, number) from a forward drill token for a snapshot, or None."""
+        fields = signer.loads(token, FORWARD)
+        # Positions in a token from another corpus name other nouns
+        if not fields or len(fields) != 4 or fields[0] != data.generation:
+            return None
+        _, noun_position, case, number = fields
+        if (not isinstance(noun_position, int) or not 0 <= noun_position < len(data.top_nouns)
+                or case not in drill_data.case_options or number not in drill_data.number_options):
+            return None
+        return noun_position, case, number
+
+    def load_form_token(token):
+        """Return the inflected word from a backward drill token, or None."""
+        fields = signer.loads(token, BACKWARD)
+        if not fields or len(fields) != 1 or not isinstance(fields[0], str):
+            return None
+        return fields[0]
+
+    def load_sentence_token(data, token):
+        """Return (case_index, position) from an insert drill token for a snapshot, or None."""
+        fields = signer.loads(token, INSERT)
+        if not fields or len(fields) != 3 or fields[0] != data.generation:
+            return None
+        fields = fields[1:]
+        if not all(isinstance(f, int) for f in fields) or not data.has_sentence(*fields):
+            return None
+        return tuple(fields)
+
+    def load_word_form_token(token):
+        """Return (pos, lemma_position, slot_index) from a word form drill token, or None."""
+        fields = signer.loads(token, WORD_FORM)
+        if not fields or len(fields) != 3:
+            return None
+        pos, lemma_position, slot_index = fields
+        if (pos not in store.tables
+                or not isinstance(lemma_position, int) or not 0 <= lemma_position < len(store.lemmas(pos))
+                or not isinstance(slot_index, int) or not 0 <= slot_index < len(PARTS_OF_SPEECH[pos].slots)):
+            return None
+        return pos, lemma_position, slot_index
+
+    def load_word_reading_token(token):
+        """Return (pos, inflected word) from a reverse word form token, or None."""
+        fields = signer.loads(token, WORD_READING)
+        if not fields or len(fields) != 2 or fields[0] not in store.tables or not isinstance(fields[1], str):
+            return None
+        return tuple(fields)
+
+    def learner_id():
+        """Return the anonymous learner id kept in the session, creating it if needed."""
+        if 'learner' not in session:
+            session['learner'] = secrets.token_urlsafe(12)
+        return session['learner']
+
+    def next_forward_question(data, selected_cases, selected_numbers):
+        """Return (noun_position, case, number) of the next forward drill question."""
+        if scheduler is not None:
+            def new_item():
+                noun = data.get_random_noun()
+                return noun, random.choice(selected_cases), random.choice(selected_numbers)
+
+            pairs = [(case, number) for case in selected_cases for number in selected_numbers]
+            noun, case, number = scheduler.next_item(learner_id(), pairs, new_item)
+            noun_position = data.noun_position(noun)
+            # Items for nouns dropped from the corpus fall through to a random pick
+            if noun_position >= 0:
+                return noun_position, case, number
+
+        noun_position = data.get_random_noun_position()
+        _, case, number, _ = generate_question(
+            morph, selected_cases, selected_numbers, noun=data.top_nouns[noun_position],
+            declensions=data.declensions
+        )
+        return noun_position, case, number
+
+    def insert_question(data, case_index, position):
+        """Return the preprocessed InsertQuestion of a sentence of a snapshot."""
+        return data.sentences.get(data.sentence_cases[case_index], position)
 
     @app.route('/set_language/<lang>')
     def set_language(lang):
@@ -31,17 +186,194 @@ def init_routes(app, morph):
     def home():
         """Render the home page."""
         lang = session.get('lang', 'en')
-        t, _, _ = get_translations(lang)
-        return render_template('home.html', t=t, lang=lang)
+        if not app.config['CACHE_HOME_PAGE']:
+            t, _, _ = get_translations(lang)
+            return render_template('home.html', t=t, lang=lang, client_drill=client_drill,
+                                   form_drills=FORM_DRILLS)
+
+        html = home_pages.get(lang)
+        if html is None:
+            t, _, _ = get_translations(lang)
+            html = home_pages[lang] = render_template('home.html', t=t, lang=lang,
+                                                      client_drill=client_drill, form_drills=FORM_DRILLS)
+
+        response = make_response(html)
+        # The page varies only by the language in the session cookie, so
+        # browsers and proxies may reuse it per cookie and revalidate by ETag
+        response.cache_control.public = True
+        response.cache_control.max_age = app.config['HOME_PAGE_MAX_AGE']
+        response.vary.add('Cookie')
+        response.add_etag()
+        return response.make_conditional(request)
+
+    @app.route('/bundle/<path:filename>')
+    def bundle_file(filename):
+        """Serve the client-side drill bundle, preferring a precompressed copy."""
+        bundle_dir = app.config['BUNDLE_DIR']
+        if filename.endswith(('.gz', '.br')):
+            abort(404)
+        # Versioned bundles never change; the manifest and page are revalidated
+        immutable = filename.startswith('drill-') and filename.endswith('.json')
+
+        encoding = None
+        if immutable:
+            accepted = request.accept_encodings
+            for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+                if accepted[candidate] and os.path.isfile(os.path.join(bundle_dir, filename + suffix)):
+                    encoding = candidate
+                    break
+
+        max_age = 31536000 if immutable else None
+        if encoding:
+            response = send_from_directory(bundle_dir, filename + ('.br' if encoding == 'br' else '.gz'),
+                                           mimetype='application/json', max_age=max_age)
+            response.content_encoding = encoding
+        else:
+            response = send_from_directory(bundle_dir, filename, max_age=max_age)
+        response.vary.add('Accept-Encoding')
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        return response
+
+    @app.route('/cache_stats')
+    def cache_stats():
+        """Report hit/miss/eviction counters of the analyzer caches."""
+        return jsonify(morph.stats())
+
+    @app.route('/api/questions/<drill>')
+    def api_questions(drill):
+        """Return a batch of questions as JSON so a client can prefetch a set."""
+        if drill not in ('forward', 'backward', 'insert'):
+            abort(404)
+
+        count = request.args.get('count', 10, type=int)
+        count = max(0, min(count, app.config['MAX_BATCH_SIZE']))
+
+        pos = request.args.get('pos')
+        if pos:
+            # Word form questions for another part of speech; nouns have the drills above
+            if pos not in FORM_DRILLS or drill == 'insert':
+                abort(404)
+            part = PARTS_OF_SPEECH[pos]
+            labels = get_grammeme_labels(session.get('lang', 'en'))
+            with phase("generate"):
+                questions = generate_form_questions(
+                    store, pos, drill, count, part.matching_slots(request.args.getlist('grammemes'))
+                )
+            for q in questions:
+                lemma_position, slot_index = q.pop("lemma_position"), q.pop("slot_index")
+                if drill == 'forward':
+                    q["form"] = part.describe(slot_index, labels)
+                    q["token"] = signer.dumps(WORD_FORM, pos, lemma_position, slot_index)
+                    del q["answer"]
+                else:
+                    q["token"] = signer.dumps(WORD_READING, pos, q["inflected_word"])
+                    del q["valid_slots"]
+            # Backward answers name a slot by its index in this list
+            slots = [part.describe(index, labels) for index in range(len(part.slots))]
+            return jsonify(drill=drill, pos=pos, slots=slots, questions=questions)
+
+        # One snapshot for the whole request; a reload may swap in another meanwhile
+        data = drill_data.snapshot
+        selected_cases = [c for c in request.args.getlist('cases') if c in drill_data.case_options]
+        selected_numbers = [n for n in request.args.getlist('numbers') if n in drill_data.number_options]
+        if not selected_cases:
+            # The backward drill asks about every case by default
+            selected_cases = list(drill_data.case_options) if drill == 'backward' else ["gent"]
+        if not selected_numbers:
+            selected_numbers = list(drill_data.number_options) if drill == 'backward' else ["sing"]
+
+        with phase("generate"):
+            questions = generate_questions(
+                morph, drill, count, selected_cases, selected_numbers, data, data.declensions,
+                sentences=data.sentences
+            )
+        # Replace answers with signed tokens; answers are checked via /api/check
+        for q in questions:
+            if drill == 'insert':
+                q["token"] = signer.dumps(INSERT, data.generation, q.pop("case_index"), q.pop("position"))
+                del q["answer"], q["case"]
+            elif drill == 'forward':
+                q["token"] = signer.dumps(FORWARD, data.generation, q.pop("noun_position"), q["case"], q["number"])
+                del q["answer"]
+            else:
+                # The backward answer follows from the displayed form alone
+                q["token"] = signer.dumps(BACKWARD, q["inflected_word"])
+                del q["noun_position"], q["case"], q["number"], q["valid_pairs"]
+        return jsonify(drill=drill, questions=questions)
+
+    @app.route('/api/check', methods=['POST'])
+    def api_check():
+        """
+        Check an answer to a question from /api/questions.
+
+        Expects JSON with the question's token and either an answer (forward
+        and insert drills), a case and number (backward drill) or a slot
+        index (backward word form drill).
+        """
+        lang = session.get('lang', 'en')
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            abort(400)
+        token = body.get("token")
+        data = drill_data.snapshot
+
+        answer = str(body.get("answer", ""))
+
+        fields = load_noun_token(data, token)
+        if fields:
+            noun_position, case, number = fields
+            noun = data.top_nouns[noun_position]
+            declensions = data.declensions
+            correct_answer = declensions.inflect(noun, case, number) or "Error"
+            grade = grade_answer(answer, correct_answer, declensions.accepted_answers(noun, case, number),
+                                 declensions.lemma_forms(noun))
+            if scheduler is not None:
+                scheduler.record(learner_id(), (noun, case, number), grade == CORRECT)
+            return jsonify(correct=grade == CORRECT, grade=grade,
+                           feedback=get_feedback(answer, correct_answer, lang, grade))
+
+        inflected_word = load_form_token(token)
+        if inflected_word is not None:
+            pair = (body.get("case"), body.get("number"))
+            if not all(isinstance(value, str) for value in pair):
+                abort(400)
+            return jsonify(correct=pair in data.declensions.case_number_pairs(inflected_word))
+
+        fields = load_word_form_token(token)
+        if fields:
+            correct_answer = store.form(*fields) or "Error"
+            grade = grade_answer(answer, correct_answer, store.accepted_answers(*fields),
+                                 store.lemma_forms(*fields[:2]))
+            return jsonify(correct=grade == CORRECT, grade=grade,
+                           feedback=get_feedback(answer, correct_answer, lang, grade))
+
+        fields = load_word_reading_token(token)
+        if fields:
+            slot = body.get("slot")
+            return jsonify(correct=isinstance(slot, int) and slot in store.readings(*fields))
+
+        fields = load_sentence_token(data, token)
+        if fields:
+            question = insert_question(data, *fields)
+            grade = grade_answer(answer, question.answer, question.accepted, question.lemma_forms)
+            return jsonify(correct=grade == CORRECT, grade=grade,
+                           feedback=get_feedback(answer, question.answer, lang, grade))
+
+        abort(400)
 
     @app.route('/forward_drill', methods=['GET', 'POST'])
     def forward_drill():
         """Handle the forward drill route."""
         feedback = None
+        submitted_answer = ""
+        token = None
 
         # Retrieve chosen language from session (default to English)
         lang = session.get('lang', 'en')
         t, case_options_display, number_options_display = get_translations(lang)
+        data = drill_data.snapshot
 
         # Get training options from the form (if present)
         selected_cases = request.form.getlist("cases")
@@ -53,35 +385,42 @@ def init_routes(app, morph):
         if not selected_numbers:
             selected_numbers = ["sing"]  # default to Singular
 
-        if request.method == 'POST':
-            action = request.form.get("action")
-            if action == "submit":
-                # Validate the user's answer and retain it
-                submitted_answer = request.form.get('answer')
-                correct_answer = request.form.get('correct_answer')
-                question = request.form.get('question')
-                current_case = request.form.get('current_case')
-                current_number = request.form.get('current_number')
-                feedback = get_feedback(submitted_answer, correct_answer, lang)
-            elif action == "next":
-                # Generate a new question without validating an answer
-                question, current_case, current_number, correct_answer = generate_question(
-                    morph, selected_cases, selected_numbers, drill_data=drill_data
+        if request.method == 'POST' and request.form.get("action") == "submit":
+            fields = load_noun_token(data, request.form.get("token"))
+            if fields:
+                # Validate the user's answer against the question in the token
+                noun_position, current_case, current_number = fields
+                question = data.top_nouns[noun_position]
+                declensions = data.declensions
+                correct_answer = declensions.inflect(question, current_case, current_number) or "Error"
+                submitted_answer = request.form.get('answer', '')
+                grade = grade_answer(submitted_answer, correct_answer,
+                                     declensions.accepted_answers(question, current_case, current_number),
+                                     declensions.lemma_forms(question))
+                feedback = get_feedback(submitted_answer, correct_answer, lang, grade)
+                token = request.form.get("token")
+                if scheduler is not None:
+                    scheduler.record(learner_id(), (question, current_case, current_number), grade == CORRECT)
+
+        if token is None:
+            if request.method == 'GET':
+                # On initial GET, use defaults
+                selected_cases = ["gent"]
+                selected_numbers = ["sing"]
+            # Generate a new question without validating an answer
+            with phase("generate"):
+                noun_position, current_case, current_number = next_forward_question(
+                    data, selected_cases, selected_numbers
                 )
-        else:
-            # On initial GET, use defaults
-            selected_cases = ["gent"]
-            selected_numbers = ["sing"]
-            question, current_case, current_number, correct_answer = generate_question(
-                morph, selected_cases, selected_numbers, drill_data=drill_data
-            )
+                question = data.top_nouns[noun_position]
+                token = signer.dumps(FORWARD, data.generation, noun_position, current_case, current_number)
 
         return render_template(
             "forward_drill.html",
             question=question,
-            correct_answer=correct_answer,
+            token=token,
             feedback=feedback,
-            submitted_answer=submitted_answer if request.method == 'POST' and request.form.get("action") == "submit" else "",
+            submitted_answer=submitted_answer,
             selected_cases=selected_cases,
             selected_numbers=selected_numbers,
             current_case=current_case,
@@ -99,60 +438,63 @@ def init_routes(app, morph):
         submitted_answer = ""
         lang = session.get('lang', 'en')
         t, case_options_display, number_options_display = get_translations(lang)
+        data = drill_data.snapshot
 
-        # Use all available case and number keys for generating question
-        case_keys = list(drill_data.case_options.keys())
-        number_keys = list(drill_data.number_options.keys())
-
-        # Generate a backward drill question
-        noun = drill_data.get_random_noun()
-        correct_case = random.choice(case_keys)
         if request.method == 'POST':
             number_mode = request.form.get("number_mode", "both")
         else:
             number_mode = "both"
-        if number_mode == "both":
-            correct_number = random.choice(number_keys)
-        elif number_mode == "singular":
-            correct_number = "sing"
-        elif number_mode == "plural":
-            correct_number = "plur"
+
+        inflected_word = None
+        if request.method == 'POST' and request.form.get("action") == "submit":
+            inflected_word = load_form_token(request.form.get("token"))
+
+        if inflected_word is not None:
+            # Check the answer against every reading of the word in the token
+            token = request.form.get("token")
+
+            user_case = str(request.form.get("selected_case"))
+            user_number = str(request.form.get("selected_number"))
+            # All valid (case, number) pairs of the inflected word
+            valid_pairs = data.declensions.case_number_pairs(inflected_word)
+
+            case_options = drill_data.get_case_options(lang)
+            number_options = drill_data.get_number_options(lang)
+            if (user_case, user_number) in valid_pairs:
+                feedback = "Correct!" if lang == 'en' else "Правильно!"
+            else:
+                valid_pair = next(iter(valid_pairs), (None, None))
+                feedback = (f"Incorrect. A correct answer is {case_options.get(valid_pair[0], valid_pair[0])} / {number_options.get(valid_pair[1], valid_pair[1])}."
+                            if lang == 'en'
+                            else f"Неверно. Один из правильных ответов: {case_options.get(valid_pair[0], valid_pair[0])} / {number_options.get(valid_pair[1], valid_pair[1])}.")
+                submitted_answer = f"{case_options.get(user_case, user_case)} / {number_options.get(user_number, user_number)}"
         else:
-            correct_number = random.choice(number_keys)
-        p = morph.parse(noun)[0]
-        inflected_obj = p.inflect({correct_case, correct_number})
-        inflected_word = inflected_obj.word if inflected_obj else "Error"
+            with phase("generate"):
+                # Use all available case and number keys for generating question
+                case_keys = list(drill_data.case_options.keys())
+                number_keys = list(drill_data.number_options.keys())
 
-        if request.method == 'POST':
-            action = request.form.get("action")
-            if action == "submit":
-                user_case = str(request.form.get("selected_case"))
-                user_number = str(request.form.get("selected_number"))
-                inflected_word = request.form.get("inflected_word")
-                # Compute all valid (case, number) pairs from the inflected word
-                valid_pairs = set()
-                for parse in morph.parse(inflected_word):
-                    if parse.tag.case and parse.tag.number:
-                        valid_pairs.add((parse.tag.case, parse.tag.number))
-
-                case_options = drill_data.get_case_options(lang)
-                number_options = drill_data.get_number_options(lang)
-                if (user_case, user_number) in valid_pairs:
-                    feedback = "Correct!" if lang == 'en' else "Правильно!"
+                # Generate a backward drill question
+                noun = data.get_random_noun()
+                correct_case = random.choice(case_keys)
+                if number_mode == "both":
+                    correct_number = random.choice(number_keys)
+                elif number_mode == "singular":
+                    correct_number = "sing"
+                elif number_mode == "plural":
+                    correct_number = "plur"
                 else:
-                    valid_pair = next(iter(valid_pairs), (None, None))
-                    feedback = (f"Incorrect. A correct answer is {case_options.get(valid_pair[0], valid_pair[0])} / {number_options.get(valid_pair[1], valid_pair[1])}."
-                                if lang == 'en'
-                                else f"Неверно. Один из правильных ответов: {case_options.get(valid_pair[0], valid_pair[0])} / {number_options.get(valid_pair[1], valid_pair[1])}.")
-                    submitted_answer = f"{case_options.get(user_case, user_case)} / {number_options.get(user_number, user_number)}"
+                    correct_number = random.choice(number_keys)
+                inflected_word = data.declensions.inflect(noun, correct_case, correct_number) or "Error"
+                # The token carries only the displayed word, so it gives nothing away
+                token = signer.dumps(BACKWARD, inflected_word)
 
         return render_template(
             "backward_drill.html",
             inflected_word=inflected_word,
+            token=token,
             feedback=feedback,
-            submitted_answer=submitted_answer if request.method == 'POST' and request.form.get("action") == "submit" else "",
-            current_case=correct_case,
-            current_number=correct_number,
+            submitted_answer=submitted_answer,
             possible_cases=drill_data.get_case_options(lang),
             possible_numbers=drill_data.get_number_options(lang),
             number_mode=number_mode,
@@ -168,62 +510,102 @@ def init_routes(app, morph):
         t, _, _ = get_translations(lang)
         submitted_answer = ""
 
-        # On GET or if "next" button is pressed, generate a new question
-        if request.method == 'GET' or request.form.get("action") == "next":
-            chosen_case, sentence_data = drill_data.get_random_sentence()
+        data = drill_data.snapshot
+        fields = None
+        if request.method == 'POST' and request.form.get("action") == "submit":
+            fields = load_sentence_token(data, request.form.get("token"))
+
+        if fields:
+            # Check the answer to the sentence in the token
+            token = request.form.get("token")
+            question = insert_question(data, *fields)
+            blank_sentence, correct_word, normal_form = question.blank_sentence, question.answer, question.normal_form
+
+            user_answer = request.form.get("answer", "")
+            submitted_answer = user_answer
+            feedback = get_feedback(user_answer, correct_word, lang,
+                                    grade_answer(user_answer, correct_word, question.accepted,
+                                                 question.lemma_forms))
+        else:
+            # On GET, "next", or an unreadable token, generate a new question
+            with phase("generate"):
+                case_index, position = data.get_random_sentence_position()
 
-            if not sentence_data:
+            if case_index < 0:
                 # Fallback if no sentences are available
                 return render_template(
                     "insert_drill.html",
                     blank_sentence="No sentences available.",
                     normal_form="",
                     feedback=None,
-                    correct_word="",
+                    token="",
                     t=t,
                     lang=lang
                 )
 
-            full_sentence = sentence_data["sentence"]
-            word_index = sentence_data["word_index"]
-            words = full_sentence.split()
-
-            if word_index - 1 < len(words):
-                missing_word = words[word_index - 1]
-            else:
-                missing_word = ""
+            with phase("generate"):
+                question = insert_question(data, case_index, position)
+                blank_sentence, normal_form = question.blank_sentence, question.normal_form
+                token = signer.dumps(INSERT, data.generation, case_index, position)
 
-            # Remove punctuation from missing word
-            stripped_word = missing_word.strip(".,!?")
-            if stripped_word:
-                normal_form = morph.parse(stripped_word)[0].normal_form
-            else:
-                normal_form = ""
+        return render_template(
+            "insert_drill.html",
+            blank_sentence=blank_sentence,
+            normal_form=normal_form,
+            token=token,
+            feedback=feedback,
+            submitted_answer=submitted_answer,
+            t=t,
+            lang=lang
+        )
 
-            # Replace the target word with a blank
-            words[word_index - 1] = "_____"
-            blank_sentence = " ".join(words)
+    @app.route('/forms_drill/<pos>', methods=['GET', 'POST'])
+    def forms_drill(pos):
+        """Handle the adjective, pronoun and verb form drills."""
+        if pos not in FORM_DRILLS:
+            abort(404)
+        part = PARTS_OF_SPEECH[pos]
+        feedback = None
+        submitted_answer = ""
+        token = None
+        lang = session.get('lang', 'en')
+        t, _, _ = get_translations(lang)
+        labels = get_grammeme_labels(lang)
 
-            # Store the correct answer
-            correct_word = stripped_word
+        # Nothing selected allows every slot
+        selected = request.form.getlist("grammemes")
 
-        # If the user submitted an answer, use the hidden fields to check
-        elif request.method == 'POST' and request.form.get("action") == "submit":
-            user_answer = request.form.get("answer")
-            submitted_answer = user_answer
-            correct_word = request.form.get("correct_word")
-            blank_sentence = request.form.get("blank_sentence")
-            normal_form = request.form.get("normal_form")
+        if request.method == 'POST' and request.form.get("action") == "submit":
+            fields = load_word_form_token(request.form.get("token"))
+            if fields and fields[0] == pos:
+                _, lemma_position, slot_index = fields
+                correct_answer = store.form(*fields) or "Error"
+                submitted_answer = request.form.get('answer', '')
+                grade = grade_answer(submitted_answer, correct_answer, store.accepted_answers(*fields),
+                                     store.lemma_forms(pos, lemma_position))
+                feedback = get_feedback(submitted_answer, correct_answer, lang, grade)
+                token = request.form.get("token")
 
-            feedback = get_feedback(user_answer, correct_word, lang)
+        if token is None:
+            with phase("generate"):
+                picked = generate_form_question(store, pos, part.matching_slots(selected))
+            if picked is None:
+                lemma_position = slot_index = None
+            else:
+                lemma_position, slot_index, _ = picked
+                token = signer.dumps(WORD_FORM, pos, lemma_position, slot_index)
 
         return render_template(
-            "insert_drill.html",
-            blank_sentence=blank_sentence,
-            normal_form=normal_form,
+            "forms_drill.html",
+            pos=pos,
+            question=store.lemmas(pos)[lemma_position] if lemma_position is not None else None,
+            form_label=part.describe(slot_index, labels) if slot_index is not None else "",
+            token=token,
             feedback=feedback,
-            submitted_answer=submitted_answer if request.method == 'POST' and request.form.get("action") == "submit" else "",
-            correct_word=correct_word,
+            submitted_answer=submitted_answer,
+            axes=part.axes,
+            labels=labels,
+            selected=selected,
             t=t,
             lang=lang
         )
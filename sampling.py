@@ -0,0 +1,55 @@
+"""
+Constant-time weighted sampling for the Russian Noun Cases Drill application.
+"""
+
+import random
+from array import array
+from typing import Sequence
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table over a fixed list of weights.
+
+    Building the table is O(n); every draw afterwards is O(1) regardless of
+    the number of entries, so it is rebuilt only when the corpus changes.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        """
+        Args:
+            weights: Non-negative weight per entry; at least one must be positive
+        """
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("AliasTable needs at least one positive weight")
+
+        self._prob = array("d", [0.0]) * n
+        self._alias = array("I", [0]) * n
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            small_index, large_index = small.pop(), large.pop()
+            self._prob[small_index] = scaled[small_index]
+            self._alias[small_index] = large_index
+            scaled[large_index] -= 1.0 - scaled[small_index]
+            (small if scaled[large_index] < 1.0 else large).append(large_index)
+        # Whatever is left is 1.0 up to rounding error
+        for i in small + large:
+            self._prob[i] = 1.0
+
+    def __len__(self) -> int:
+        return len(self._prob)
+
+    def sample(self, rng=random) -> int:
+        """Draw one index with probability proportional to its weight."""
+        i = rng.randrange(len(self._prob))
+        return i if rng.random() < self._prob[i] else self._alias[i]
+
+
+def zipf_weights(count: int, exponent: float = 1.0) -> array:
+    """Weights for a list ordered by frequency, most common first."""
+    return array("d", (1.0 / (rank + 1) ** exponent for rank in range(count)))
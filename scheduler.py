@@ -0,0 +1,262 @@
+"""
+Spaced-repetition scheduling for the Russian Noun Cases Drill application.
+
+Every answer to a (noun, case, number) item updates that learner's SM-2
+state for the item: its easiness factor, repetition count, interval and
+due time. The next item is the one that is most overdue, found at the top
+of per-(case, number) heaps in O(log n); when nothing is due a new item is
+introduced.
+
+State lives in SQLite. Learners are loaded into memory on first use and
+kept in a bounded LRU; updates go to an in-memory write-back buffer that
+is flushed in one transaction when it fills up or ages out. Under several
+gunicorn workers each worker keeps its own cache, and a cached learner is
+reloaded after `learner_ttl` seconds to pick up other workers' writes.
+"""
+
+import atexit
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from paradigms import CASES, NUMBERS, CaseNumber
+
+# (noun, case, number)
+Item = Tuple[str, str, str]
+
+# SM-2 answer grades: a correct answer keeps the easiness factor, a wrong
+# one resets the item and lowers it
+CORRECT_QUALITY = 4
+WRONG_QUALITY = 1
+MIN_EASINESS = 1.3
+INITIAL_EASINESS = 2.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    learner TEXT NOT NULL,
+    noun TEXT NOT NULL,
+    case_id INTEGER NOT NULL,
+    number_id INTEGER NOT NULL,
+    easiness REAL NOT NULL,
+    repetitions INTEGER NOT NULL,
+    interval REAL NOT NULL,
+    due REAL NOT NULL,
+    PRIMARY KEY (learner, noun, case_id, number_id)
+) WITHOUT ROWID
+"""
+
+
+class ItemState:
+    """SM-2 state of one item for one learner."""
+
+    __slots__ = ("easiness", "repetitions", "interval", "due")
+
+    def __init__(self, easiness: float = INITIAL_EASINESS, repetitions: int = 0,
+                 interval: float = 0.0, due: float = 0.0):
+        self.easiness = easiness
+        self.repetitions = repetitions
+        # Seconds until the next review after the last successful one
+        self.interval = interval
+        self.due = due
+
+
+def sm2_update(state: ItemState, quality: int, now: float, interval_seconds: float,
+               relearn_seconds: float):
+    """
+    Apply one SM-2 review to an item state in place.
+
+    Args:
+        state: The item's state
+        quality: Answer grade from 0 (blackout) to 5 (perfect)
+        now: Current time as a Unix timestamp
+        interval_seconds: Length of one SM-2 interval unit (a day in SM-2)
+        relearn_seconds: Delay before a failed item is asked again
+    """
+    state.easiness = max(MIN_EASINESS, state.easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if quality < 3:
+        state.repetitions = 0
+        state.interval = 0.0
+        state.due = now + relearn_seconds
+        return
+    state.repetitions += 1
+    if state.repetitions == 1:
+        state.interval = interval_seconds
+    elif state.repetitions == 2:
+        state.interval = 6 * interval_seconds
+    else:
+        state.interval *= state.easiness
+    state.due = now + state.interval
+
+
+class _Learner:
+    """In-memory states and due-time heaps of one learner."""
+
+    __slots__ = ("states", "heaps", "loaded")
+
+    def __init__(self, loaded: float):
+        self.states: Dict[Item, ItemState] = {}
+        # (case, number) -> heap of (due, noun); entries whose due time no
+        # longer matches the state are stale and skipped lazily
+        self.heaps: Dict[CaseNumber, List[Tuple[float, str]]] = {}
+        self.loaded = loaded
+
+    def push(self, item: Item, state: ItemState):
+        noun, case, number = item
+        self.states[item] = state
+        heapq.heappush(self.heaps.setdefault((case, number), []), (state.due, noun))
+
+    def earliest(self, pairs: Iterable[CaseNumber]) -> Optional[Tuple[float, Item]]:
+        """Return (due, item) of the earliest-due item among the pairs."""
+        best = None
+        for case, number in pairs:
+            heap = self.heaps.get((case, number))
+            while heap:
+                due, noun = heap[0]
+                state = self.states.get((noun, case, number))
+                if state is not None and state.due == due:
+                    break
+                heapq.heappop(heap)
+            if heap and (best is None or heap[0][0] < best[0]):
+                best = (heap[0][0], (heap[0][1], case, number))
+        return best
+
+
+class ReviewScheduler:
+    """Class to schedule drill items per learner with SM-2 over a SQLite store."""
+
+    def __init__(self, path: str, interval_seconds: float = 86400.0, relearn_seconds: float = 60.0,
+                 max_learners: int = 10000, flush_size: int = 256, flush_interval: float = 5.0,
+                 learner_ttl: float = 300.0):
+        """
+        Args:
+            path: SQLite database file
+            interval_seconds: Length of one SM-2 interval unit
+            relearn_seconds: Delay before a wrongly answered item comes back
+            max_learners: Learners kept in memory
+            flush_size: Buffered updates that trigger a flush
+            flush_interval: Seconds after which buffered updates are flushed
+            learner_ttl: Seconds after which a cached learner is reloaded
+        """
+        self.interval_seconds = interval_seconds
+        self.relearn_seconds = relearn_seconds
+        self.max_learners = max_learners
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.learner_ttl = learner_ttl
+
+        self.path = path
+        # pid -> that process's connection, opened on first use
+        self._connections: Dict[int, sqlite3.Connection] = {}
+
+        self._learners: "OrderedDict[str, _Learner]" = OrderedDict()
+        # (learner, item) -> state waiting to be written
+        self._pending: Dict[Tuple[str, Item], ItemState] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """Return this process's connection, opening it on first use."""
+        # SQLite connections must not cross fork(), and under gunicorn's
+        # preload_app the scheduler is built in the master; connections of
+        # other processes are left untouched rather than closed here
+        pid = os.getpid()
+        db = self._connections.get(pid)
+        if db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            db.execute(SCHEMA)
+            self._connections[pid] = db
+        return db
+
+    def _learner(self, learner_id: str) -> _Learner:
+        now = time.monotonic()
+        learner = self._learners.get(learner_id)
+        if learner is not None and now - learner.loaded < self.learner_ttl:
+            self._learners.move_to_end(learner_id)
+            return learner
+
+        # Write buffered updates first so the rows read back are current
+        self._flush_locked()
+        learner = _Learner(now)
+        rows = self._db.execute(
+            "SELECT noun, case_id, number_id, easiness, repetitions, interval, due "
+            "FROM reviews WHERE learner = ?", (learner_id,))
+        for noun, case_id, number_id, easiness, repetitions, interval, due in rows:
+            if case_id < len(CASES) and number_id < len(NUMBERS):
+                learner.push((noun, CASES[case_id], NUMBERS[number_id]),
+                             ItemState(easiness, repetitions, interval, due))
+
+        self._learners[learner_id] = learner
+        self._learners.move_to_end(learner_id)
+        if len(self._learners) > self.max_learners:
+            # Pending updates stay in the buffer, so eviction loses nothing
+            self._learners.popitem(last=False)
+        return learner
+
+    def next_item(self, learner_id: str, pairs: Iterable[CaseNumber],
+                  new_item: Callable[[], Item], attempts: int = 5) -> Item:
+        """
+        Pick the learner's next item.
+
+        Args:
+            learner_id: The learner
+            pairs: (case, number) pairs the learner is drilling
+            new_item: Returns a random candidate item from the selection
+            attempts: Candidates tried when looking for an unseen item
+
+        Returns:
+            The most overdue item, else an unseen item, else the item due soonest
+        """
+        with self._lock:
+            learner = self._learner(learner_id)
+            earliest = learner.earliest(pairs)
+            if earliest is not None and earliest[0] <= time.time():
+                return earliest[1]
+            candidate = None
+            for _ in range(attempts):
+                candidate = new_item()
+                if candidate not in learner.states:
+                    return candidate
+            return earliest[1] if earliest is not None else candidate
+
+    def record(self, learner_id: str, item: Item, correct: bool):
+        """Record an answer to an item and reschedule it."""
+        noun, case, number = item
+        if case not in CASES or number not in NUMBERS:
+            return
+        with self._lock:
+            learner = self._learner(learner_id)
+            state = learner.states.get(item) or ItemState()
+            sm2_update(state, CORRECT_QUALITY if correct else WRONG_QUALITY, time.time(),
+                       self.interval_seconds, self.relearn_seconds)
+            learner.push(item, state)
+            self._pending[(learner_id, item)] = state
+            if (len(self._pending) >= self.flush_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        """Write buffered updates to the database."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        rows = [
+            (learner_id, noun, CASES.index(case), NUMBERS.index(number),
+             state.easiness, state.repetitions, state.interval, state.due)
+            for (learner_id, (noun, case, number)), state in self._pending.items()
+        ]
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self._pending.clear()
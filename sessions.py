@@ -0,0 +1,294 @@
+"""
+Server-side sessions for the Russian Noun Cases Drill application.
+
+The cookie only carries a random session id; the data lives in a store:
+
+    memory  an in-process LRU, for a single worker
+    sqlite  a SQLite file shared by every gunicorn worker, fronted by a
+            per-worker LRU that is revalidated against a version number
+
+Sessions are loaded on first access, so requests that never touch the
+session do no store lookup at all, and are written back only when they
+were modified.
+"""
+
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from flask.sessions import SessionInterface, SessionMixin
+
+from metrics import phase
+
+SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{43}$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    sid TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+class LazySession(SessionMixin):
+    """Session whose data is fetched from the store on first access."""
+
+    def __init__(self, sid: str, loader: Optional[Callable[[], Optional[Dict[str, Any]]]], new: bool):
+        """
+        Args:
+            sid: The session id
+            loader: Returns the stored data, or None if the id is unknown
+                or expired; None for new sessions
+            new: Whether the session id was just created
+        """
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+        self._loader = loader
+        self._data: Optional[Dict[str, Any]] = None if loader else {}
+
+    def _load(self) -> Dict[str, Any]:
+        self.accessed = True
+        if self._data is None:
+            with phase("session"):
+                data = self._loader()
+            if data is None:
+                # Never adopt an id the client chose (session fixation):
+                # an unknown id is replaced by a fresh one
+                self.sid = secrets.token_urlsafe(32)
+                self.new = True
+                data = {}
+            self._data = data
+        return self._data
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self._load()[key]
+        self.modified = True
+
+    def __iter__(self) -> Iterator:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __contains__(self, key) -> bool:
+        return key in self._load()
+
+    def get(self, key, default=None):
+        return self._load().get(key, default)
+
+    def setdefault(self, key, default=None):
+        data = self._load()
+        if key not in data:
+            data[key] = default
+            self.modified = True
+        return data[key]
+
+    def clear(self):
+        if self._load():
+            self._data.clear()
+            self.modified = True
+
+
+class MemorySessionStore:
+    """Class to keep sessions in an in-process LRU."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        # sid -> (expires, data)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return dict(entry[1])
+
+    def set(self, sid: str, data: Dict[str, Any], expires: float):
+        with self._lock:
+            self._entries[sid] = (expires, dict(data))
+            self._entries.move_to_end(sid)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, sid: str):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+
+class SQLiteSessionStore:
+    """Class to keep sessions in a SQLite file shared between worker processes."""
+
+    # Writes between purges of expired sessions
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str, cache_size: int):
+        """
+        Args:
+            path: SQLite database file
+            cache_size: Sessions kept decoded in this process
+        """
+        self.path = path
+        self.cache_size = cache_size
+        # pid -> that process's connection, opened on first use
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        # sid -> (version, data); revalidated on every read, since another
+        # worker may have written the session since
+        self._cache: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """Return this process's connection, opening it on first use."""
+        # The store is built before gunicorn forks its workers, and SQLite
+        # connections must not cross fork(); each worker opens its own
+        pid = os.getpid()
+        db = self._connections.get(pid)
+        if db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            db.execute(SCHEMA)
+            self._connections[pid] = db
+        return db
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cached = self._cache.get(sid)
+            known_version = cached[0] if cached else -1
+            # The data column is only sent when the cached copy is stale
+            row = self._db.execute(
+                "SELECT version, CASE WHEN version = ? THEN NULL ELSE data END "
+                "FROM sessions WHERE sid = ? AND expires >= ?",
+                (known_version, sid, time.time()),
+            ).fetchone()
+            if row is None:
+                self._cache.pop(sid, None)
+                return None
+            version, raw = row
+            if raw is None:
+                self._cache.move_to_end(sid)
+                return dict(cached[1])
+            data = json.loads(raw)
+            self._remember(sid, version, data)
+            return dict(data)
+
+    def set(self, sid: str, data: Dict[str, Any], expires: float):
+        raw = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            version = self._db.execute(
+                "INSERT INTO sessions VALUES (?, 1, ?, ?) ON CONFLICT(sid) DO UPDATE SET "
+                "version = version + 1, data = excluded.data, expires = excluded.expires "
+                "RETURNING version",
+                (sid, raw, expires),
+            ).fetchone()[0]
+            self._remember(sid, version, dict(data))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._db.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+
+    def delete(self, sid: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+            self._cache.pop(sid, None)
+
+    def _remember(self, sid: str, version: int, data: Dict[str, Any]):
+        self._cache[sid] = (version, data)
+        self._cache.move_to_end(sid)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Session interface keeping only a random session id in the cookie."""
+
+    def __init__(self, store):
+        """
+        Args:
+            store: MemorySessionStore or SQLiteSessionStore
+        """
+        self.store = store
+
+    def open_session(self, app, request) -> LazySession:
+        sid = request.cookies.get(self.get_cookie_name(app), "")
+        if SESSION_ID_RE.match(sid):
+            return LazySession(sid, lambda: self.store.get(sid), new=False)
+        return LazySession(secrets.token_urlsafe(32), None, new=True)
+
+    def save_session(self, app, session: LazySession, response):
+        if session.accessed:
+            response.vary.add("Cookie")
+        if not session.modified:
+            return
+
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            self.store.delete(session.sid)
+            if not session.new:
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        expires = time.time() + app.permanent_session_lifetime.total_seconds()
+        self.store.set(session.sid, dict(session), expires)
+        # The id never changes, so the cookie is only sent once
+        if session.new or session.permanent:
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+
+def create_session_interface(config) -> Optional[ServerSideSessionInterface]:
+    """
+    Build the session interface for the configured backend.
+
+    Args:
+        config: The Flask app config
+
+    Returns:
+        A ServerSideSessionInterface, or None for Flask's cookie sessions
+    """
+    backend = config['SESSION_BACKEND']
+    if backend == 'memory':
+        return ServerSideSessionInterface(MemorySessionStore(config['SESSION_CACHE_SIZE']))
+    if backend == 'sqlite':
+        if not config['SESSION_DB']:
+            raise ValueError("SESSION_BACKEND=sqlite needs SESSION_DB")
+        return ServerSideSessionInterface(
+            SQLiteSessionStore(config['SESSION_DB'], config['SESSION_CACHE_SIZE'])
+        )
+    if backend != 'cookie':
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+    return None
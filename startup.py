@@ -0,0 +1,138 @@
+"""
+Startup timing for the Russian Noun Cases Drill application.
+
+Records how long each initialization phase takes and, when the
+STARTUP_PROFILE environment variable is set, how long each module takes
+to import. prewarm() runs one synthetic request through every drill so
+the first real request does not pay for lazy loading.
+"""
+
+import builtins
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+# Phase name -> seconds spent, in the order the phases first finished
+phase_timings: Dict[str, float] = {}
+# Phases that ran inside another phase, and so are not added to the total
+nested_phases: Set[str] = set()
+
+# Module name -> seconds spent importing it, excluding its own imports
+import_timings: Dict[str, float] = {}
+
+# Imports listed in the report
+REPORTED_IMPORTS = 15
+
+# Pages requested by prewarm(), one per drill
+PREWARM_PATHS = (
+    '/', '/forward_drill', '/backward_drill', '/insert_drill',
+    '/forms_drill/adjective', '/forms_drill/pronoun', '/forms_drill/verb',
+)
+
+_import_state = threading.local()
+_phase_state = threading.local()
+
+
+@contextmanager
+def timed(phase: str):
+    """Record how long an initialization phase takes."""
+    depth = getattr(_phase_state, 'depth', 0)
+    if depth:
+        nested_phases.add(phase)
+    _phase_state.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase_timings[phase] = phase_timings.get(phase, 0.0) + time.perf_counter() - start
+        _phase_state.depth = depth
+
+
+def profile_imports() -> bool:
+    """
+    Time every module imported from now on, if STARTUP_PROFILE is set.
+
+    Call before the heavy imports. Each module is charged only for its own
+    body; the modules it imports are recorded separately.
+
+    Returns:
+        Whether import profiling is active
+    """
+    if not os.environ.get('STARTUP_PROFILE'):
+        return False
+    if getattr(builtins.__import__, '_drill_profiled', False):
+        return True
+    original_import = builtins.__import__
+
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        module = name
+        if level:
+            try:
+                module = importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__'))
+            except (ImportError, ValueError):
+                pass
+        if module in sys.modules:
+            return original_import(name, globals, locals, fromlist, level)
+
+        # Seconds spent in nested imports, per import in progress
+        stack: List[float] = getattr(_import_state, 'stack', None)
+        if stack is None:
+            stack = _import_state.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            import_timings[module] = import_timings.get(module, 0.0) + elapsed - nested
+            if stack:
+                stack[-1] += elapsed
+
+    timed_import._drill_profiled = True
+    builtins.__import__ = timed_import
+    return True
+
+
+def prewarm(app) -> None:
+    """
+    Request every drill page once so lazy state is loaded before real traffic.
+
+    The requests carry a 'drill.prewarm' environ flag so they are left out
+    of the request metrics.
+    """
+    client = app.test_client()
+    for path in PREWARM_PATHS:
+        response = client.get(path, environ_base={'drill.prewarm': True})
+        if response.status_code != 200:
+            logger.warning("Prewarm request to %s returned %s", path, response.status_code)
+
+
+def report() -> str:
+    """Format the recorded phase and import timings as a small table."""
+    lines = ["Startup timing:"]
+    for phase, seconds in phase_timings.items():
+        # Nested phases are indented; their time is part of the enclosing phase
+        label = f"  {phase}" if phase in nested_phases else phase
+        lines.append(f"  {label:<32} {seconds * 1000:8.1f} ms")
+    total = sum(seconds for phase, seconds in phase_timings.items() if phase not in nested_phases)
+    lines.append(f"  {'total':<32} {total * 1000:8.1f} ms")
+    if import_timings:
+        slowest = sorted(import_timings.items(), key=lambda item: item[1], reverse=True)
+        lines.append(f"Slowest imports ({len(import_timings)} modules, "
+                     f"{sum(import_timings.values()) * 1000:.1f} ms in total):")
+        for module, seconds in slowest[:REPORTED_IMPORTS]:
+            lines.append(f"  {module:<32} {seconds * 1000:8.1f} ms")
+    return "\n".join(lines)
+
+
+def log_report() -> None:
+    """Write the startup timing table to the log."""
+    logger.info(report())
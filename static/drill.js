@@ -0,0 +1,272 @@
+/*
+ * Client-side drill mode: generates and checks forward, backward and insert
+ * questions in the browser from the bundle written by bundle.py, so the
+ * server only serves static files.
+ */
+(function () {
+    'use strict';
+
+    var data = null;
+    var lang = localStorage.getItem('drill-lang') || 'en';
+    var drill = 'forward';
+    var current = null;
+
+    var $ = function (id) { return document.getElementById(id); };
+
+    function randomInt(n) {
+        return Math.floor(Math.random() * n);
+    }
+
+    function pairBit(caseIndex, numberIndex) {
+        return 1 << (caseIndex * data.numbers.length + numberIndex);
+    }
+
+    // Same canonical spelling as answers.normalize_answer
+    function normalize(text) {
+        var map = data.normalize.map, strip = data.normalize.strip, out = '';
+        for (var i = 0; i < text.length; i++) {
+            var ch = text[i];
+            out += Object.prototype.hasOwnProperty.call(map, ch) ? map[ch] : ch;
+        }
+        out = out.toLowerCase();
+        var start = 0, end = out.length;
+        while (start < end && strip.indexOf(out[start]) >= 0) start++;
+        while (end > start && strip.indexOf(out[end - 1]) >= 0) end--;
+        return out.slice(start, end);
+    }
+
+    // Optimal string alignment distance, as answers.within_edits
+    function withinEdits(a, b, maxEdits) {
+        if (Math.abs(a.length - b.length) > maxEdits) return false;
+        var d = [];
+        for (var i = 0; i <= a.length; i++) {
+            d.push([i]);
+            for (var j = 1; j <= b.length; j++) {
+                if (i === 0) { d[i].push(j); continue; }
+                var cost = a[i - 1] === b[j - 1] ? 0 : 1;
+                var v = Math.min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + cost);
+                if (i > 1 && j > 1 && a[i - 1] === b[j - 2] && a[i - 2] === b[j - 1]) {
+                    v = Math.min(v, d[i - 2][j - 2] + 1);
+                }
+                d[i].push(v);
+            }
+        }
+        return d[a.length][b.length] <= maxEdits;
+    }
+
+    // Like answers.grade_answer: another form of the same word is a wrong
+    // answer, not a typo, however close its spelling
+    function grade(input, accepted, lemmaForms) {
+        var answer = normalize(input);
+        if (!answer) return 'wrong';
+        if (accepted.indexOf(answer) >= 0) return 'correct';
+        if (lemmaForms.indexOf(answer) >= 0) return 'wrong';
+        for (var i = 0; i < accepted.length; i++) {
+            if (withinEdits(answer, accepted[i], accepted[i].length <= 6 ? 1 : 2)) return 'almost';
+        }
+        return 'wrong';
+    }
+
+    function feedback(result, correctAnswer) {
+        var ru = lang === 'ru';
+        if (result === 'correct') return ru ? 'Правильно!' : 'Correct!';
+        if (result === 'almost') {
+            return ru ? 'Почти, проверьте написание. Правильный ответ: ' + correctAnswer + '.'
+                      : 'Almost, check the spelling. The correct answer is ' + correctAnswer + '.';
+        }
+        return ru ? 'Неверно. Правильный ответ: ' + correctAnswer + '.'
+                  : 'Incorrect. The correct answer is ' + correctAnswer + '.';
+    }
+
+    function formOf(nounIndex, caseIndex, numberIndex) {
+        var slot = (nounIndex * data.cases.length + caseIndex) * data.numbers.length + numberIndex;
+        var id = data.paradigms[slot];
+        return id < 0 ? null : id;
+    }
+
+    // Normalized spellings of every form of a noun
+    function lemmaForms(noun) {
+        var forms = [], width = data.cases.length * data.numbers.length;
+        for (var k = 0; k < width; k++) {
+            var id = data.paradigms[noun * width + k];
+            if (id >= 0) {
+                var spelling = normalize(data.forms[id]);
+                if (forms.indexOf(spelling) < 0) forms.push(spelling);
+            }
+        }
+        return forms;
+    }
+
+    function checked(containerId) {
+        var boxes = $(containerId).querySelectorAll('input:checked');
+        return Array.prototype.map.call(boxes, function (box) { return Number(box.value); });
+    }
+
+    function nextForward() {
+        var cases = checked('case-options'), numbers = checked('number-options');
+        if (!cases.length) cases = [data.cases.indexOf('gent')];
+        if (!numbers.length) numbers = [0];
+        for (var attempt = 0; attempt < 20; attempt++) {
+            var noun = randomInt(data.nouns.length);
+            var c = cases[randomInt(cases.length)], n = numbers[randomInt(numbers.length)];
+            var form = formOf(noun, c, n);
+            if (form === null) continue;
+            // Every form of the noun that can express the pair is accepted
+            var accepted = [normalize(data.forms[form])];
+            for (var k = 0; k < data.cases.length * data.numbers.length; k++) {
+                var other = data.paradigms[noun * data.cases.length * data.numbers.length + k];
+                if (other >= 0 && (data.form_masks[other] & pairBit(c, n))) {
+                    var spelling = normalize(data.forms[other]);
+                    if (accepted.indexOf(spelling) < 0) accepted.push(spelling);
+                }
+            }
+            return {noun: noun, caseIndex: c, numberIndex: n, answer: data.forms[form], accepted: accepted,
+                    lemmaForms: lemmaForms(noun)};
+        }
+        return null;
+    }
+
+    function nextBackward() {
+        for (var attempt = 0; attempt < 20; attempt++) {
+            var form = formOf(randomInt(data.nouns.length), randomInt(data.cases.length),
+                              randomInt(data.numbers.length));
+            if (form !== null) return {form: form};
+        }
+        return null;
+    }
+
+    function nextInsert() {
+        var buckets = data.insert_sentences;
+        if (!buckets.length) return null;
+        var bucket = buckets[randomInt(buckets.length)];
+        var row = bucket.sentences[randomInt(bucket.sentences.length)];
+        // row[4] holds every form of the hinted word, declined by bundle.py
+        return {blank: row[0], answer: row[1], normalForm: row[2], accepted: [normalize(row[1])],
+                lemmaForms: row[4]};
+    }
+
+    function render() {
+        var tr = data.translations[lang], t = tr.t;
+        document.documentElement.lang = lang;
+        $('drill-title').textContent = t[drill + '_drill'];
+        document.querySelectorAll('[data-t]').forEach(function (el) { el.textContent = t[el.dataset.t]; });
+        document.querySelectorAll('[data-drill]').forEach(function (el) {
+            el.textContent = t[el.dataset.drill + '_drill'];
+            el.className = 'btn ' + (el.dataset.drill === drill ? 'btn-primary' : 'btn-secondary');
+        });
+
+        $('forward-options').hidden = drill !== 'forward';
+        $('answer').hidden = drill === 'backward';
+        $('pair-select').hidden = drill !== 'backward';
+        $('answer').placeholder = t.your_answer;
+        $('hint').textContent = '';
+
+        if (!current) {
+            $('question').textContent = '';
+            return;
+        }
+        if (drill === 'forward') {
+            $('question').textContent = t.convert + ' ' + data.nouns[current.noun] + ' ' + t.into + ' ' +
+                tr.cases[data.cases[current.caseIndex]] + ' ' + t.form + ' (' +
+                tr.numbers[data.numbers[current.numberIndex]] + ').';
+        } else if (drill === 'backward') {
+            $('question').textContent = t.select_case_and_number + ' ' + data.forms[current.form];
+        } else {
+            $('question').textContent = t.insert_instruction + ' ' + current.blank;
+            $('hint').textContent = t.insert_hint + ' ' + current.normalForm + ' )';
+        }
+    }
+
+    function buildOptions() {
+        var tr = data.translations[lang];
+        var fill = function (containerId, keys, labels, defaults) {
+            var container = $(containerId), previous = checked(containerId);
+            container.innerHTML = '';
+            keys.forEach(function (key, index) {
+                var label = document.createElement('label');
+                label.className = 'checkbox-container';
+                var box = document.createElement('input');
+                box.type = 'checkbox';
+                box.value = index;
+                box.checked = previous.length ? previous.indexOf(index) >= 0 : defaults.indexOf(key) >= 0;
+                var text = document.createElement('span');
+                text.className = 'checkbox-label';
+                text.textContent = labels[key];
+                label.appendChild(box);
+                label.appendChild(text);
+                container.appendChild(label);
+            });
+        };
+        fill('case-options', data.cases, tr.cases, ['gent']);
+        fill('number-options', data.numbers, tr.numbers, ['sing']);
+
+        var select = function (id, keys, labels) {
+            var el = $(id), value = el.value;
+            el.innerHTML = '';
+            keys.forEach(function (key, index) {
+                var option = document.createElement('option');
+                option.value = index;
+                option.textContent = labels[key];
+                el.appendChild(option);
+            });
+            if (value) el.value = value;
+        };
+        select('selected-case', data.cases, tr.cases);
+        select('selected-number', data.numbers, tr.numbers);
+    }
+
+    function nextQuestion() {
+        current = drill === 'forward' ? nextForward() : drill === 'backward' ? nextBackward() : nextInsert();
+        $('answer').value = '';
+        $('feedback').hidden = true;
+        render();
+    }
+
+    function submit(event) {
+        event.preventDefault();
+        if (!current) return;
+        var result, shown;
+        if (drill === 'backward') {
+            var bit = pairBit(Number($('selected-case').value), Number($('selected-number').value));
+            result = data.form_masks[current.form] & bit ? 'correct' : 'wrong';
+            // A form can express several pairs, so there is no single answer to show
+            shown = result === 'correct' ? feedback(result) : (lang === 'ru' ? 'Неверно.' : 'Incorrect.');
+        } else {
+            result = grade($('answer').value, current.accepted, current.lemmaForms);
+            shown = feedback(result, current.answer);
+        }
+        var el = $('feedback');
+        el.textContent = shown;
+        el.className = 'feedback ' + (result === 'correct' ? 'feedback-correct' : 'feedback-incorrect');
+        el.hidden = false;
+    }
+
+    function init(bundle) {
+        data = bundle;
+        document.querySelectorAll('[data-drill]').forEach(function (el) {
+            el.addEventListener('click', function () { drill = el.dataset.drill; nextQuestion(); });
+        });
+        document.querySelectorAll('[data-lang]').forEach(function (el) {
+            el.addEventListener('click', function (event) {
+                event.preventDefault();
+                lang = el.dataset.lang;
+                localStorage.setItem('drill-lang', lang);
+                buildOptions();
+                render();
+            });
+        });
+        $('drill-form').addEventListener('submit', submit);
+        $('next').addEventListener('click', nextQuestion);
+        $('drill-form').hidden = false;
+        buildOptions();
+        nextQuestion();
+    }
+
+    // The manifest is revalidated on every load; the bundle it names is
+    // immutable and cached for good
+    fetch('manifest.json', {cache: 'no-cache'})
+        .then(function (response) { return response.json(); })
+        .then(function (manifest) { return fetch(manifest.bundle); })
+        .then(function (response) { return response.json(); })
+        .then(init);
+})();
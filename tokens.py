@@ -0,0 +1,54 @@
+"""
+Signed question tokens for the Russian Noun Cases Drill application.
+
+A token identifies a question by what is already shown on the page (corpus
+positions, the requested case and number, or the displayed word) rather
+than by its answer. Tokens holding corpus positions also carry the
+corpus generation, so they are rejected once a reload moves the
+positions. Tokens are signed, not encrypted, so they must never carry
+anything the learner is not supposed to see; checking a submission is a
+lookup in the precomputed data.
+"""
+
+from typing import List, Optional
+
+from itsdangerous import BadSignature, URLSafeSerializer
+
+FORWARD = "f"
+BACKWARD = "b"
+INSERT = "i"
+# Word form drills of the other parts of speech
+WORD_FORM = "w"
+WORD_READING = "r"
+
+
+class QuestionSigner:
+    """Class to sign and verify compact question tokens."""
+
+    def __init__(self, secret_key: str):
+        """
+        Args:
+            secret_key: The application's SECRET_KEY
+        """
+        self._serializer = URLSafeSerializer(secret_key, salt="question")
+
+    def dumps(self, kind: str, *fields) -> str:
+        """Sign a question of the given kind ('f', 'b', 'i', 'w' or 'r')."""
+        return self._serializer.dumps([kind, *fields])
+
+    def loads(self, token: Optional[str], kind: str) -> Optional[List]:
+        """
+        Verify a token and return its fields.
+
+        Returns None if the token is missing, not a string, tampered with,
+        or was issued for a different kind of question.
+        """
+        if not token or not isinstance(token, str):
+            return None
+        try:
+            payload = self._serializer.loads(token)
+        except BadSignature:
+            return None
+        if not isinstance(payload, list) or not payload or payload[0] != kind:
+            return None
+        return payload[1:]
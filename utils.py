@@ -2,12 +2,21 @@
 Utility functions for the Russian Noun Cases Drill application.
 """
 
-from typing import Dict, Tuple, Any
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple, Any
 
-def get_translations(lang: str) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
+from answers import ALMOST, CORRECT, grade_answer
+
+def get_translations(lang: str) -> Tuple[Mapping[str, str], Mapping[str, str], Mapping[str, str]]:
     """
     Return translation dictionaries based on the language.
 
+    The tables are built once at import and returned as read-only mappings,
+    so every request shares the same objects.
+
     Args:
         lang: The language code ('en' or 'ru')
 
@@ -17,6 +26,10 @@ def get_translations(lang: str) -> Tuple[Dict[str, str], Dict[str, str], Dict[st
         - case_options_display: Dictionary of case names
         - number_options_display: Dictionary of number names
     """
+    return _TRANSLATIONS['ru' if lang == 'ru' else 'en']
+
+def _build_translations(lang: str) -> Tuple[Mapping[str, str], Mapping[str, str], Mapping[str, str]]:
+    """Build the frozen translation tables for a language."""
     if lang == 'ru':
         t = {
             'welcome': 'Добро пожаловать в тренировку склонения русских существительных',
@@ -35,7 +48,20 @@ def get_translations(lang: str) -> Tuple[Dict[str, str], Dict[str, str], Dict[st
             'intro_text': 'Практикуйтесь в склонении существительных на русском языке!',
             'insert_drill': 'Вставьте слово в пропуск',
             'insert_instruction': 'Вставьте недостающее слово в предложение ниже:',
-            'insert_hint': '(Подсказка: начальная форма недостающего слова —'
+            'insert_hint': '(Подсказка: начальная форма недостающего слова —',
+            'client_drill': 'Тренировка в браузере',
+            'adjective_drill': 'Тренировка: склонение прилагательных',
+            'pronoun_drill': 'Тренировка: склонение местоимений',
+            'verb_drill': 'Тренировка: спряжение глаголов',
+            'put_word': 'Поставьте слово',
+            'into_form': 'в форму:',
+            'no_words': 'Нет слов для тренировки.',
+            'axis_tense': 'Время:',
+            'axis_person': 'Лицо:',
+            'axis_case': 'Падеж:',
+            'axis_gender': 'Род:',
+            'axis_number': 'Число:',
+            'axis_animacy': 'Одушевлённость:'
         }
         case_options_display = {
             "nomn": "Именительный",
@@ -67,7 +93,20 @@ def get_translations(lang: str) -> Tuple[Dict[str, str], Dict[str, str], Dict[st
             'intro_text': 'Practice Russian noun declensions interactively!',
             'insert_drill': 'Insert Word Drill: Fill in the gap',
             'insert_instruction': 'Fill in the missing word in the sentence below:',
-            'insert_hint': '(Hint: The normal form of the missing word is'
+            'insert_hint': '(Hint: The normal form of the missing word is',
+            'client_drill': 'In-Browser Drill',
+            'adjective_drill': 'Adjective Drill',
+            'pronoun_drill': 'Pronoun Drill',
+            'verb_drill': 'Verb Conjugation Drill',
+            'put_word': 'Put the word',
+            'into_form': 'into the form:',
+            'no_words': 'No words available.',
+            'axis_tense': 'Tense:',
+            'axis_person': 'Person:',
+            'axis_case': 'Case:',
+            'axis_gender': 'Gender:',
+            'axis_number': 'Number:',
+            'axis_animacy': 'Animacy:'
         }
         case_options_display = {
             "nomn": "Nominative",
@@ -81,18 +120,71 @@ def get_translations(lang: str) -> Tuple[Dict[str, str], Dict[str, str], Dict[st
             "sing": "Singular",
             "plur": "Plural"
         }
-    return t, case_options_display, number_options_display
+    return (MappingProxyType(t), MappingProxyType(case_options_display),
+            MappingProxyType(number_options_display))
+
+_TRANSLATIONS = {lang: _build_translations(lang) for lang in ('en', 'ru')}
+
+def get_grammeme_labels(lang: str) -> Mapping[str, str]:
+    """
+    Return display names of the grammemes the word form drills use.
+
+    Args:
+        lang: The language code ('en' or 'ru')
+
+    Returns:
+        A read-only mapping from grammeme (e.g. 'gent', 'femn', '1per') to its name
+    """
+    return _GRAMMEME_LABELS['ru' if lang == 'ru' else 'en']
+
+def _build_grammeme_labels(lang: str) -> Mapping[str, str]:
+    """Build the frozen grammeme name table for a language."""
+    _, case_options_display, number_options_display = _TRANSLATIONS[lang]
+    if lang == 'ru':
+        labels = {
+            "pres": "Настоящее время",
+            "futr": "Будущее время",
+            "past": "Прошедшее время",
+            "impr": "Повелительное наклонение",
+            "1per": "1-е лицо",
+            "2per": "2-е лицо",
+            "3per": "3-е лицо",
+            "masc": "Мужской род",
+            "femn": "Женский род",
+            "neut": "Средний род",
+            "anim": "Одушевлённое",
+            "inan": "Неодушевлённое"
+        }
+    else:
+        labels = {
+            "pres": "Present",
+            "futr": "Future",
+            "past": "Past",
+            "impr": "Imperative",
+            "1per": "1st person",
+            "2per": "2nd person",
+            "3per": "3rd person",
+            "masc": "Masculine",
+            "femn": "Feminine",
+            "neut": "Neuter",
+            "anim": "Animate",
+            "inan": "Inanimate"
+        }
+    return MappingProxyType({**case_options_display, **number_options_display, **labels})
+
+_GRAMMEME_LABELS = {lang: _build_grammeme_labels(lang) for lang in ('en', 'ru')}
 
-def generate_question(morph, selected_cases, selected_numbers, noun=None, drill_data=None):
+def generate_question(morph, selected_cases, selected_numbers, noun=None, drill_data=None, declensions=None):
     """
     Generate a question for the forward drill.
 
     Args:
-        morph: The pymorphy3 MorphAnalyzer instance
+        morph: The Morphology (or CachedMorphology) instance
         selected_cases: List of selected grammatical cases
         selected_numbers: List of selected grammatical numbers
         noun: Optional specific noun to use (if None, a random one is selected)
-        drill_data: Optional DrillData instance to use for getting a random noun
+        drill_data: Optional CorpusSnapshot to use for getting a random noun
+        declensions: Optional DeclensionIndex to look the inflected form up in
 
     Returns:
         A tuple containing (noun, case, number, inflected_form)
@@ -101,7 +193,6 @@ def generate_question(morph, selected_cases, selected_numbers, noun=None, drill_
         noun = drill_data.get_random_noun()
     elif noun is None:
         # Fallback to a random noun from a hardcoded list
-        import random
         TOP_NOUNS = [
             "слово", "человек", "время", "дело", "жизнь",
             "день", "рука", "работа", "место", "право"
@@ -109,18 +200,239 @@ def generate_question(morph, selected_cases, selected_numbers, noun=None, drill_
         noun = random.choice(TOP_NOUNS)
 
     # Randomly select a case and a number from the chosen options
-    import random
     case = random.choice(selected_cases) if selected_cases else "gent"
     number = random.choice(selected_numbers) if selected_numbers else "sing"
 
-    p = morph.parse(noun)[0]
-    # Attempt to inflect the noun to the chosen case and number
-    inflected_obj = p.inflect({case, number})
-    inflected = inflected_obj.word if inflected_obj else "Error"
+    if declensions is not None:
+        inflected = declensions.inflect(noun, case, number) or "Error"
+    else:
+        # Attempt to inflect the noun to the chosen case and number
+        inflected = morph.inflect(noun, case, number) or "Error"
 
     return noun, case, number, inflected
 
-def get_feedback(user_input, correct_answer, lang):
+def split_sentence(sentence: str, word_index: int) -> Tuple[str, str]:
+    """
+    Blank out the target word of an insert drill sentence.
+
+    Args:
+        sentence: The full sentence
+        word_index: 1-based position of the target word
+
+    Returns:
+        A tuple containing (blank_sentence, answer) where the answer has
+        surrounding punctuation stripped
+    """
+    words = sentence.split()
+
+    if word_index - 1 < len(words):
+        missing_word = words[word_index - 1]
+    else:
+        missing_word = ""
+
+    # Remove punctuation from missing word
+    answer = missing_word.strip(".,!?")
+
+    # Replace the target word with a blank
+    words[word_index - 1] = "_____"
+    return " ".join(words), answer
+
+def build_insert_question(morph, sentence_data: Dict[str, Any]) -> Tuple[str, str, str]:
+    """
+    Turn an insert drill sentence into a question.
+
+    Args:
+        morph: The Morphology (or CachedMorphology) instance
+        sentence_data: A sentence entry from DrillData.insert_sentences
+
+    Returns:
+        A tuple containing (blank_sentence, answer, normal_form)
+    """
+    if "blank_sentence" in sentence_data:
+        # Sentences from a drill pack are already split
+        return sentence_data["blank_sentence"], sentence_data["answer"], sentence_data["normal_form"]
+
+    blank_sentence, answer = split_sentence(sentence_data["sentence"], sentence_data["word_index"])
+    normal_form = morph.normal_form(answer) if answer else ""
+    return blank_sentence, answer, normal_form
+
+def draw_distinct(total: int):
+    """
+    Yield the integers below `total` in random order, each exactly once.
+
+    A lazy partial Fisher-Yates shuffle: swapped slots are kept in a dict,
+    so drawing k values costs O(k) time and memory whatever `total` is.
+    """
+    swapped = {}
+    for i in range(total):
+        j = random.randrange(i, total)
+        value = swapped.get(j, j)
+        swapped[j] = swapped.pop(i, i)
+        yield value
+
+def generate_questions(morph, drill, count, selected_cases, selected_numbers, drill_data, declensions,
+                       sentences=None):
+    """
+    Generate a set of distinct questions in one call.
+
+    Questions are sampled without replacement from every (item, case, number)
+    combination allowed by the selection, so a set never repeats itself until
+    the combinations run out. Forms come from the precomputed paradigms;
+    combinations without a form are skipped and drawing goes on, so a set
+    is only short when fewer than `count` combinations have a form.
+
+    Args:
+        morph: The Morphology (or CachedMorphology) instance
+        drill: 'forward', 'backward' or 'insert'
+        count: Number of questions wanted
+        selected_cases: List of selected grammatical cases
+        selected_numbers: List of selected grammatical numbers
+        drill_data: CorpusSnapshot (DrillData.snapshot) holding the corpus
+        declensions: DeclensionIndex covering drill_data.top_nouns
+        sentences: Optional SentenceIndex over drill_data.insert_sentences
+
+    Returns:
+        A list of at most `count` question dictionaries
+    """
+    if drill == "insert":
+        cases = drill_data.sentence_cases
+        # Flat index over all cases; bisect on the running totals maps back
+        offsets = list(accumulate(len(drill_data.insert_sentences[case]) for case in cases))
+        total = offsets[-1] if offsets else 0
+        questions = []
+        for flat in random.sample(range(total), min(count, total)):
+            case_index = bisect_right(offsets, flat)
+            position = flat - (offsets[case_index - 1] if case_index else 0)
+            case, sentence_data = drill_data.get_sentence(case_index, position)
+            if sentences is not None:
+                question = sentences.get(case, position)
+                blank_sentence, answer, normal_form = question.blank_sentence, question.answer, question.normal_form
+            else:
+                blank_sentence, answer, normal_form = build_insert_question(morph, sentence_data)
+            questions.append({
+                "case_index": case_index,
+                "position": position,
+                "case": case,
+                "blank_sentence": blank_sentence,
+                "normal_form": normal_form,
+                "answer": answer,
+            })
+        return questions
+
+    # Repeated query parameters would weight some combinations twice
+    selected_cases = list(dict.fromkeys(selected_cases))
+    selected_numbers = list(dict.fromkeys(selected_numbers))
+    nouns = drill_data.top_nouns
+    total = len(nouns) * len(selected_cases) * len(selected_numbers)
+    questions = []
+    for flat in draw_distinct(total):
+        if len(questions) >= count:
+            break
+        rest, n = divmod(flat, len(selected_numbers))
+        noun_position, c = divmod(rest, len(selected_cases))
+        noun, case, number = nouns[noun_position], selected_cases[c], selected_numbers[n]
+        inflected = declensions.inflect(noun, case, number)
+        if inflected is None:
+            # Pluralia and singularia tantum have no form in one number
+            continue
+        if drill == "forward":
+            questions.append({
+                "noun_position": noun_position,
+                "question": noun,
+                "case": case,
+                "number": number,
+                "answer": inflected,
+            })
+        else:
+            questions.append({
+                "noun_position": noun_position,
+                "inflected_word": inflected,
+                "case": case,
+                "number": number,
+                "valid_pairs": sorted(declensions.case_number_pairs(inflected)),
+            })
+    return questions
+
+def generate_form_question(store, pos, slot_indices, attempts=20):
+    """
+    Generate a question for a word form drill.
+
+    Random picks are retried a few times, since some lemmas have no form
+    in some slots (perfective verbs have no present tense); after that
+    the lemmas are scanned from a random start.
+
+    Args:
+        store: ParadigmStore holding the drill words
+        pos: Part of speech name ('adjective', 'pronoun' or 'verb')
+        slot_indices: Indices of the slots the selection allows
+
+    Returns:
+        A tuple containing (lemma_position, slot_index, form), or None if
+        no allowed slot of any lemma has a form
+    """
+    lemma_count = len(store.lemmas(pos))
+    if not lemma_count or not slot_indices:
+        return None
+    for _ in range(attempts):
+        lemma_position, slot_index = random.randrange(lemma_count), random.choice(slot_indices)
+        form = store.form(pos, lemma_position, slot_index)
+        if form is not None:
+            return lemma_position, slot_index, form
+    start = random.randrange(lemma_count)
+    for offset in range(lemma_count):
+        lemma_position = (start + offset) % lemma_count
+        for slot_index in random.sample(slot_indices, len(slot_indices)):
+            form = store.form(pos, lemma_position, slot_index)
+            if form is not None:
+                return lemma_position, slot_index, form
+    return None
+
+def generate_form_questions(store, pos, drill, count, slot_indices):
+    """
+    Generate a set of distinct word form questions in one call.
+
+    (lemma, slot) combinations are drawn without replacement and those
+    without a form are skipped while drawing goes on, so a set is only
+    short when the selection leaves fewer than `count` forms.
+
+    Args:
+        store: ParadigmStore holding the drill words
+        pos: Part of speech name ('adjective', 'pronoun' or 'verb')
+        drill: 'forward' (give the form) or 'backward' (name the slot)
+        count: Number of questions wanted
+        slot_indices: Indices of the slots the selection allows
+
+    Returns:
+        A list of at most `count` question dictionaries
+    """
+    lemmas = store.lemmas(pos)
+    total = len(lemmas) * len(slot_indices)
+    questions = []
+    for flat in draw_distinct(total):
+        if len(questions) >= count:
+            break
+        lemma_position, s = divmod(flat, len(slot_indices))
+        slot_index = slot_indices[s]
+        form = store.form(pos, lemma_position, slot_index)
+        if form is None:
+            continue
+        if drill == "forward":
+            questions.append({
+                "lemma_position": lemma_position,
+                "slot_index": slot_index,
+                "question": lemmas[lemma_position],
+                "answer": form,
+            })
+        else:
+            questions.append({
+                "lemma_position": lemma_position,
+                "slot_index": slot_index,
+                "inflected_word": form,
+                "valid_slots": sorted(store.readings(pos, form)),
+            })
+    return questions
+
+def get_feedback(user_input, correct_answer, lang, grade=None):
     """
     Generate feedback based on the user's answer.
 
@@ -128,12 +440,19 @@ def get_feedback(user_input, correct_answer, lang):
         user_input: The user's answer
         correct_answer: The correct answer
         lang: The language code ('en' or 'ru')
+        grade: The answer's grade from answers.grade_answer, if already known
 
     Returns:
         Feedback message
     """
-    if user_input.strip().lower() == correct_answer.strip().lower():
+    if grade is None:
+        grade = grade_answer(user_input, correct_answer)
+    if grade == CORRECT:
         return "Correct!" if lang == 'en' else "Правильно!"
+    elif grade == ALMOST:
+        return (f"Almost, check the spelling. The correct answer is {correct_answer}."
+                if lang == 'en' else
+                f"Почти, проверьте написание. Правильный ответ: {correct_answer}.")
     else:
         return (f"Incorrect. The correct answer is {correct_answer}."
                 if lang == 'en' else